@@ -0,0 +1,780 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import fnmatch
+import inspect
+import resource
+import threading
+import contextlib
+import subprocess
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import history
+import leaderboard_scraper
+import stats_scraper
+from outbound import API_HOST, SITE_HOST, scheduler
+from tracker_parse import (
+    LeaderboardStream,
+    extract_leaderboard_items,
+    parse_leaderboard_rows,
+)
+
+BENCH_ITERATIONS = int(os.environ.get("BENCH_ITERATIONS", "50"))
+BENCH_WARMUP = int(os.environ.get("BENCH_WARMUP", "3"))
+BENCH_ACT_ID = leaderboard_scraper.ACT_ID
+BENCH_REGION = "na"
+BENCH_TAG = "bench"
+STREAM_CHUNK_SIZE = 16 * 1024
+HISTORY_BENCH_PLAYERS = 20000
+HISTORY_BENCH_SNAPSHOTS = 24
+HISTORY_BENCH_START = 1_760_000_000
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTUP_MODULES = ("stats_scraper", "leaderboard_scraper", "zygote")
+# Must not be loaded by a bare import of any STARTUP_MODULES entry.
+HEAVY_MODULES = ("curl_cffi", "playwright", "numpy")
+
+LEADERBOARD_PATH = "/valorant/leaderboards/ranked/all/default"
+PROFILE_PATH = "/api/v2/valorant/standard/profile/riot/"
+
+# name -> (players, padding KB, has state, has rows, malformed state)
+LEADERBOARD_VARIANTS = {
+    "small": (100, 0, True, True, False),
+    "medium": (100, 256, True, True, False),
+    "large": (100, 2048, True, True, False),
+    "dom": (100, 256, False, True, False),
+    "malformed": (100, 256, True, True, True),
+}
+# name -> extra non-competitive segments
+PROFILE_VARIANTS = {"small": 4, "large": 400}
+
+CHALLENGE_HTML = """<!DOCTYPE html><html><head><title>Just a moment...</title></head>
+<body><div id="challenge-running">Checking your browser before accessing tracker.gg.</div>
+<script src="/cdn-cgi/challenge-platform/h/g/orchestrate/jsch/v1"></script></body></html>"""
+
+
+def player_name(rank: int) -> str:
+    return f"Player{rank}#{rank % 10000:04d}"
+
+
+def leaderboard_html(
+    page: int,
+    players: int,
+    padding_kb: int,
+    state: bool = True,
+    rows: bool = True,
+    malformed: bool = False,
+) -> str:
+    """Synthetic leaderboard page shaped like tracker.gg's markup."""
+    first = (page - 1) * 100 + 1
+    ranks = range(first, first + players)
+
+    parts = [
+        "<!DOCTYPE html><html><head><title>VALORANT Leaderboards - Tracker Network</title>",
+        "<script>window.__APP_CONFIG__ = ",
+        json.dumps({"filler": "x" * (padding_kb * 1024)}),
+        ";</script></head><body><table class='trn-table'><tbody>",
+    ]
+    if rows:
+        for rank in ranks:
+            handle = urllib.parse.quote(player_name(rank))
+            parts.append(
+                f'<tr class="trn-table__row"><td class="trn-table__column">{rank}</td>'
+                f'<td><a href="/valorant/profile/riot/{handle}/overview">'
+                f"{player_name(rank)}</a></td><td>{500 - rank % 500}RR</td></tr>"
+            )
+    parts.append("</tbody></table>")
+
+    if state:
+        items = [
+            {
+                "rank": rank,
+                "owner": {
+                    "id": player_name(rank),
+                    "metadata": {
+                        "platformUserHandle": player_name(rank),
+                        "platformUserIdentifier": player_name(rank),
+                        "countryCode": "US",
+                        "pictureUrl": f"https://example.invalid/avatars/{rank}.png",
+                    },
+                },
+                "value": 500 - rank % 500,
+                "displayValue": f"{500 - rank % 500}RR",
+            }
+            for rank in ranks
+        ]
+        payload = json.dumps(
+            {
+                "app": {"locale": "en-US", "config": {"flags": list(range(200))}},
+                "stats": {"standardLeaderboards": [{"id": "rank", "items": items}]},
+            }
+        )
+        if malformed:
+            payload = payload[: len(payload) // 2]
+        parts.append(f"<script>window.__INITIAL_STATE__ = {payload};</script>")
+
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def stat(value) -> dict:
+    return {"value": value, "displayValue": str(value)}
+
+
+def profile_json(segments: int) -> str:
+    """Synthetic profile API response with ``segments`` extra non-season segments."""
+    filler = [
+        {
+            "type": "agent",
+            "attributes": {"key": f"agent-{i}"},
+            "stats": {f"stat{j}": stat(j * i) for j in range(20)},
+        }
+        for i in range(segments)
+    ]
+    season = {
+        "type": "season",
+        "stats": {
+            "rank": {"value": 412, "metadata": {"tierName": "Radiant"}},
+            "kDRatio": stat(1.23),
+            "matchesWinPct": stat(56.7),
+            "matchesWon": stat(120),
+            "matchesPlayed": stat(212),
+        },
+    }
+    return json.dumps({"data": {"segments": filler + [season]}})
+
+
+def generate_fixtures() -> dict:
+    leaderboards = {
+        name: (200, leaderboard_html(i, *spec))
+        for i, (name, spec) in enumerate(LEADERBOARD_VARIANTS.items(), 1)
+    }
+    leaderboards["challenge"] = (403, CHALLENGE_HTML)
+    profiles = {name: (200, profile_json(n)) for name, n in PROFILE_VARIANTS.items()}
+    profiles["missing"] = (404, json.dumps({"errors": [{"code": "NotFound"}]}))
+    return {"leaderboard": leaderboards, "profile": profiles}
+
+
+def load_fixtures(directory: str, fixtures: dict):
+    """Add recorded ``leaderboard-<name>.html`` and ``profile-<name>.json`` files."""
+    for filename in sorted(os.listdir(directory)):
+        kind, _, rest = filename.partition("-")
+        name, ext = os.path.splitext(rest)
+        if kind not in fixtures or ext not in (".html", ".json") or not name:
+            continue
+        with open(os.path.join(directory, filename), encoding="utf-8") as f:
+            body = f.read()
+        fixtures[kind][name] = (200, body)
+
+
+def leaderboard_page_of(fixtures: dict, name: str) -> int:
+    """The stand-in server serves leaderboard variants by page number."""
+    return list(fixtures["leaderboard"]).index(name) + 1
+
+
+def profile_handle(name: str) -> str:
+    return f"{name}#{BENCH_TAG}"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle delay the body.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        fixtures = self.server.fixtures
+        parsed = urllib.parse.urlsplit(self.path)
+
+        fixture = None
+        content_type = "application/json"
+        if parsed.path == LEADERBOARD_PATH:
+            query = urllib.parse.parse_qs(parsed.query)
+            names = list(fixtures["leaderboard"])
+            page = int(query.get("page", ["1"])[0])
+            if 1 <= page <= len(names):
+                fixture = fixtures["leaderboard"][names[page - 1]]
+            content_type = "text/html; charset=utf-8"
+        elif parsed.path.startswith(PROFILE_PATH):
+            handle = urllib.parse.unquote(parsed.path[len(PROFILE_PATH) :])
+            fixture = fixtures["profile"].get(handle.partition("#")[0])
+
+        status, body = fixture or (404, "")
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def fixture_server(fixtures: dict):
+    """Serve fixtures on a local port and point both scrapers at it."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.daemon_threads = True
+    server.fixtures = fixtures
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    saved = (
+        stats_scraper.API_BASE_URL,
+        stats_scraper.LEADERBOARD_URL,
+        stats_scraper.PROFILE_CACHE_PATH,
+        leaderboard_scraper.LEADERBOARD_URL,
+        leaderboard_scraper.STORAGE_STATE_PATH,
+        history.HISTORY_DIR,
+    )
+    stats_scraper.API_BASE_URL = base_url + PROFILE_PATH
+    stats_scraper.LEADERBOARD_URL = base_url + LEADERBOARD_PATH
+    stats_scraper.PROFILE_CACHE_PATH = ""
+    leaderboard_scraper.LEADERBOARD_URL = base_url + LEADERBOARD_PATH
+    leaderboard_scraper.STORAGE_STATE_PATH = ""
+    history.HISTORY_DIR = ""
+    for host in (API_HOST, SITE_HOST, "127.0.0.1"):
+        scheduler.configure(host, 0)
+
+    try:
+        yield base_url
+    finally:
+        (
+            stats_scraper.API_BASE_URL,
+            stats_scraper.LEADERBOARD_URL,
+            stats_scraper.PROFILE_CACHE_PATH,
+            leaderboard_scraper.LEADERBOARD_URL,
+            leaderboard_scraper.STORAGE_STATE_PATH,
+            history.HISTORY_DIR,
+        ) = saved
+        server.shutdown()
+        server.server_close()
+
+
+class StaticPage:
+    """Stands in for a Playwright page whose content is already loaded."""
+
+    def __init__(self, html: str):
+        self.html = html
+
+    async def content(self) -> str:
+        return self.html
+
+
+def stream_items(html: str):
+    data = html.encode("utf-8")
+    stream = LeaderboardStream()
+    for start in range(0, len(data), STREAM_CHUNK_SIZE):
+        items = stream.feed(data[start : start + STREAM_CHUNK_SIZE])
+        if items is not None:
+            return items
+    return stream.close()
+
+
+def percentile(sorted_samples: list[float], fraction: float) -> float:
+    index = min(
+        len(sorted_samples) - 1, max(0, round(fraction * len(sorted_samples)) - 1)
+    )
+    return sorted_samples[index]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(name: str, samples: list[float], elapsed: float, failures: int) -> dict:
+    ordered = sorted(samples)
+    return {
+        "case": name,
+        "iterations": len(samples),
+        "failures": failures,
+        "ops_per_sec": round(len(samples) / elapsed, 1) if elapsed > 0 else None,
+        "p50_ms": round(1000 * percentile(ordered, 0.50), 3),
+        "p95_ms": round(1000 * percentile(ordered, 0.95), 3),
+        "p99_ms": round(1000 * percentile(ordered, 0.99), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def succeeded(result) -> bool:
+    if isinstance(result, dict):
+        return "error" not in result
+    return bool(result)
+
+
+async def measure(name: str, fn, iterations: int, warmup: int) -> dict:
+    """Time ``iterations`` calls of ``fn``, awaiting its result if needed."""
+
+    async def call():
+        try:
+            result = fn()
+            return await result if inspect.isawaitable(result) else result
+        except Exception:
+            return None
+
+    for _ in range(warmup):
+        await call()
+
+    samples = []
+    failures = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        result = await call()
+        samples.append(time.perf_counter() - call_started)
+        if not succeeded(result):
+            failures += 1
+    return summarize(name, samples, time.perf_counter() - started, failures)
+
+
+def run_python(args: list[str], expected: int = 0) -> bool:
+    proc = subprocess.run(
+        [sys.executable] + args,
+        cwd=SCRIPT_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return proc.returncode == expected
+
+
+def heavy_imports(module: str) -> list[str]:
+    """Top-level packages from HEAVY_MODULES that importing ``module`` loads."""
+    probe = (
+        f"import sys, {module}; "
+        "print('\\n'.join(sorted({name.split('.')[0] for name in sys.modules})))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=SCRIPT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [name for name in proc.stdout.split() if name in HEAVY_MODULES]
+
+
+def build_cases(fixtures: dict, browser: bool) -> dict:
+    """Map case name to a zero-argument callable. Sync and async are both fine.
+
+    A failure count on ``challenge``, ``malformed`` and ``missing`` cases is
+    expected; those fixtures exist to time the failure paths.
+    """
+    cases = {}
+    leaderboards = fixtures["leaderboard"]
+
+    for name, (_, html) in leaderboards.items():
+        page = leaderboard_page_of(fixtures, name)
+        cases[f"parse.extract/{name}"] = lambda html=html: extract_leaderboard_items(
+            html
+        )
+        cases[f"parse.initial_state/{name}"] = (
+            lambda html=html: leaderboard_scraper.parse_initial_state(StaticPage(html))
+        )
+        cases[f"parse.stream/{name}"] = lambda html=html: stream_items(html)
+        cases[f"parse.rows/{name}"] = (
+            lambda html=html, page=page: parse_leaderboard_rows(html, page)
+        )
+
+    for name, (_, body) in fixtures["profile"].items():
+        handle = profile_handle(name)
+        cases[f"parse.profile/{name}"] = (
+            lambda body=body, handle=handle: stats_scraper.parse_profile(handle, body)
+        )
+
+    for name in leaderboards:
+        page = leaderboard_page_of(fixtures, name)
+        cases[f"stats.leaderboard/{name}"] = (
+            lambda page=page: stats_scraper.get_leaderboard(
+                BENCH_REGION, page, BENCH_ACT_ID
+            )
+        )
+        cases[f"leaderboard.http/{name}"] = lambda page=page: (
+            leaderboard_scraper.fetch_leaderboard_http(
+                f"{leaderboard_scraper.LEADERBOARD_URL}?page={page}", page
+            )
+        )
+
+    for name in fixtures["profile"]:
+        handle = profile_handle(name)
+        cases[f"stats.profile/{name}"] = (
+            lambda handle=handle: stats_scraper.get_player_stats(handle)
+        )
+
+    for query in ("climbers", "player", "top"):
+        cases[f"history.{query}"] = HistoryQuery(query)
+
+    cases["startup.interpreter"] = lambda: run_python(["-c", "pass"])
+    for module in STARTUP_MODULES:
+        cases[f"startup.import/{module}"] = lambda module=module: run_python(
+            ["-c", f"import {module}"]
+        )
+    cases["startup.cli/invalid_handle"] = lambda: run_python(
+        ["stats_scraper.py", "profile", "not-a-riot-id"], expected=1
+    )
+
+    if browser:
+        for name in leaderboards:
+            page = leaderboard_page_of(fixtures, name)
+            cases[f"browser.leaderboard/{name}"] = lambda page=page: (
+                leaderboard_scraper.scrape_leaderboard_browser(
+                    f"{leaderboard_scraper.LEADERBOARD_URL}?page={page}", page
+                )
+            )
+            cases[f"browser.parse_dom/{name}"] = BrowserParse(page, dom=True)
+            cases[f"browser.parse_initial_state/{name}"] = BrowserParse(page, dom=False)
+
+    return cases
+
+
+class BrowserParse:
+    """Times ``parse_dom``/``parse_initial_state`` against a real, loaded tab."""
+
+    def __init__(self, page: int, dom: bool):
+        self.page = page
+        self.dom = dom
+        self.tab = None
+
+    async def __call__(self):
+        if self.tab is None:
+            self.tab = await leaderboard_scraper.acquire_tab()
+            await self.tab.goto(
+                f"{leaderboard_scraper.LEADERBOARD_URL}?page={self.page}",
+                wait_until="domcontentloaded",
+            )
+        if self.dom:
+            return await leaderboard_scraper.parse_dom(self.tab, self.page)
+        return await leaderboard_scraper.parse_initial_state(self.tab)
+
+    async def close(self):
+        if self.tab is not None:
+            await leaderboard_scraper.release_tab(self.tab)
+            self.tab = None
+
+
+class HistoryQuery:
+    """Times a history query against a synthetic region built on first use.
+
+    Each snapshot reshuffles a slice of the ladder so there are climbers,
+    fallers and top-N churn to find.
+    """
+
+    def __init__(self, query: str):
+        self.query = query
+
+    def __call__(self):
+        store = HistoryQuery.build()
+        since = HISTORY_BENCH_START + HISTORY_BENCH_SNAPSHOTS // 2 * 3600
+        if self.query == "climbers":
+            return store.climbers(BENCH_REGION, BENCH_ACT_ID, since)
+        if self.query == "player":
+            return store.rank_history(BENCH_REGION, BENCH_ACT_ID, player_name(500))
+        return store.top_changes(BENCH_REGION, BENCH_ACT_ID, 100, since)
+
+    _store = None
+
+    @classmethod
+    def build(cls) -> "history.HistoryStore":
+        if cls._store is None:
+            import random
+            import tempfile
+
+            rng = random.Random(0)
+            store = history.HistoryStore(tempfile.mkdtemp(prefix="bench-history-"))
+            ladder = [player_name(rank) for rank in range(1, HISTORY_BENCH_PLAYERS + 1)]
+            for snapshot in range(HISTORY_BENCH_SNAPSHOTS):
+                start = rng.randrange(0, len(ladder) - 1000)
+                window = ladder[start : start + 1000]
+                rng.shuffle(window)
+                ladder[start : start + 1000] = window
+                ts = HISTORY_BENCH_START + snapshot * 3600
+                for first in range(0, len(ladder), 100):
+                    items = [
+                        {"rank": first + i + 1, "riotId": riot_id}
+                        for i, riot_id in enumerate(ladder[first : first + 100])
+                    ]
+                    store.append(BENCH_REGION, BENCH_ACT_ID, items, ts)
+            cls._store = store
+        return cls._store
+
+
+def select_cases(cases: dict, patterns: Optional[list[str]]) -> list[str]:
+    if not patterns:
+        return list(cases)
+    return [
+        name
+        for name in cases
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+    ]
+
+
+async def run_cases(
+    fixtures: dict,
+    patterns: Optional[list[str]],
+    iterations: int,
+    warmup: int,
+    browser: bool,
+    verbose: bool,
+):
+    """Run the selected cases against the stand-in server, yielding one result each."""
+    with fixture_server(fixtures):
+        cases = build_cases(fixtures, browser)
+        try:
+            for name in select_cases(cases, patterns):
+                fn = cases[name]
+                quiet = contextlib.nullcontext() if verbose else silenced_stderr()
+                try:
+                    with quiet:
+                        result = await measure(name, fn, iterations, warmup)
+                except Exception as e:
+                    result = {"case": name, "error": str(e)}
+                finally:
+                    if isinstance(fn, BrowserParse):
+                        await fn.close()
+                yield result
+        finally:
+            await leaderboard_scraper.shutdown()
+
+
+@contextlib.contextmanager
+def silenced_stderr():
+    """Drop the scrapers' per-request logging so it doesn't skew timings."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+        yield
+
+
+async def run_isolated(names: list[str], argv: list[str]):
+    """Run each case in a fresh interpreter so peak RSS is per case."""
+    for name in names:
+        proc = await asyncio.to_thread(
+            subprocess.run,
+            [sys.executable, os.path.abspath(__file__), "run", "--case", name, "--json"]
+            + argv,
+            capture_output=True,
+            text=True,
+        )
+        lines = [line for line in proc.stdout.splitlines() if line.strip()]
+        if proc.returncode != 0 or not lines:
+            yield {"case": name, "error": proc.stderr.strip()[-500:] or "no output"}
+            continue
+        for line in lines:
+            yield json.loads(line)
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> Optional[str]:
+    """Describe a p50 regression beyond ``tolerance``, or return None."""
+    before = baseline.get(result.get("case"), {}).get("p50_ms")
+    after = result.get("p50_ms")
+    if not before or after is None or after <= before * (1 + tolerance):
+        return None
+    return f"p50 {before}ms -> {after}ms (+{100 * (after / before - 1):.0f}%)"
+
+
+def format_row(result: dict) -> str:
+    if "error" in result:
+        return f"{result['case']:<42} ERROR {result['error']}"
+    return (
+        f"{result['case']:<42} {result['ops_per_sec'] or 0:>10.1f} "
+        f"{result['p50_ms']:>10.3f} {result['p95_ms']:>10.3f} {result['p99_ms']:>10.3f} "
+        f"{result['peak_rss_mb']:>9.1f} {result['failures']:>5}"
+    )
+
+
+def record_fixtures(
+    directory: str, region: str, pages: list[int], handles: list[str], act_id: str
+):
+    """Save live leaderboard pages and profile responses for later replay."""
+    os.makedirs(directory, exist_ok=True)
+    session = stats_scraper.get_session(leaderboard_scraper.HTTP_IMPERSONATE)
+    headers = {
+        **leaderboard_scraper.get_extra_headers(),
+        "User-Agent": leaderboard_scraper.get_user_agent(),
+    }
+
+    for page in pages:
+        url = f"{stats_scraper.LEADERBOARD_URL}?platform=pc&region={region}&act={act_id}&page={page}"
+        scheduler.acquire(SITE_HOST)
+        resp = session.get(url, headers=headers, timeout=15)
+        path = os.path.join(directory, f"leaderboard-{region}{page}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(resp.text)
+        print(f"[BENCH] Recorded {path} (HTTP {resp.status_code})", file=sys.stderr)
+
+    for handle in handles:
+        url = f"{stats_scraper.API_BASE_URL}{urllib.parse.quote(handle)}"
+        scheduler.acquire(API_HOST)
+        resp = session.get(
+            url,
+            headers=stats_scraper.get_profile_headers(stats_scraper.BROWSER_CONFIGS[0]),
+            timeout=12,
+        )
+        name = "".join(c for c in handle.partition("#")[0] if c.isalnum())[:20]
+        path = os.path.join(directory, f"profile-{name}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(resp.text)
+        print(f"[BENCH] Recorded {path} (HTTP {resp.status_code})", file=sys.stderr)
+
+
+async def print_results(args, fixtures: dict):
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = {r["case"]: r for r in map(json.loads, f) if "case" in r}
+
+    if args.isolate:
+        names = select_cases(build_cases(fixtures, args.browser), args.case)
+        passthrough = [
+            "--iterations",
+            str(args.iterations),
+            "--warmup",
+            str(args.warmup),
+        ]
+        if args.fixtures:
+            passthrough += ["--fixtures", args.fixtures]
+        if args.browser:
+            passthrough.append("--browser")
+        results = run_isolated(names, passthrough)
+    else:
+        results = run_cases(
+            fixtures,
+            args.case,
+            args.iterations,
+            args.warmup,
+            args.browser,
+            args.verbose,
+        )
+
+    save = open(args.save, "w", encoding="utf-8") if args.save else None
+    regressions = 0
+
+    if not args.json:
+        print(
+            f"{'case':<42} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} "
+            f"{'rss MB':>9} {'fail':>5}"
+        )
+
+    try:
+        async for result in results:
+            regression = compare(result, baseline, args.tolerance)
+            if regression:
+                result["regression"] = regression
+                regressions += 1
+
+            if args.json:
+                print(json.dumps(result), flush=True)
+            else:
+                suffix = f"  REGRESSION {regression}" if regression else ""
+                print(format_row(result) + suffix, flush=True)
+            if save:
+                save.write(json.dumps(result) + "\n")
+    finally:
+        if save:
+            save.close()
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Offline scraper benchmarks against a local tracker.gg stand-in"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run benchmark cases")
+    run_parser.add_argument(
+        "--case",
+        action="append",
+        help="Glob of case names to run, e.g. 'parse.*' (repeatable, default all)",
+    )
+    run_parser.add_argument("--iterations", type=int, default=BENCH_ITERATIONS)
+    run_parser.add_argument("--warmup", type=int, default=BENCH_WARMUP)
+    run_parser.add_argument(
+        "--fixtures", type=str, help="Directory of recorded fixtures to replay as well"
+    )
+    run_parser.add_argument(
+        "--browser", action="store_true", help="Also run the Playwright cases"
+    )
+    run_parser.add_argument(
+        "--isolate",
+        action="store_true",
+        help="Run every case in its own process so peak RSS is per case",
+    )
+    run_parser.add_argument("--json", action="store_true", help="Emit NDJSON results")
+    run_parser.add_argument("--save", type=str, help="Write NDJSON results to a file")
+    run_parser.add_argument(
+        "--baseline", type=str, help="Flag cases slower than a saved run"
+    )
+    run_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed p50 slowdown against the baseline (0.2 = 20%%)",
+    )
+    run_parser.add_argument(
+        "--verbose", action="store_true", help="Keep scraper logging on stderr"
+    )
+
+    subparsers.add_parser(
+        "imports", help="Fail if a bare scraper import loads a heavy dependency"
+    )
+
+    list_parser = subparsers.add_parser("list", help="List benchmark case names")
+    list_parser.add_argument("--browser", action="store_true")
+    list_parser.add_argument("--fixtures", type=str)
+
+    record_parser = subparsers.add_parser(
+        "record", help="Save live pages and profiles as replayable fixtures"
+    )
+    record_parser.add_argument("directory", type=str, help="Fixture directory")
+    record_parser.add_argument("--region", type=str, default=BENCH_REGION)
+    record_parser.add_argument(
+        "--pages", type=leaderboard_scraper.parse_pages, default=[1]
+    )
+    record_parser.add_argument("--act-id", type=str, default=BENCH_ACT_ID)
+    record_parser.add_argument("--handles", type=str, nargs="*", default=[])
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "record":
+            record_fixtures(
+                args.directory,
+                stats_scraper.validate_region(args.region),
+                args.pages,
+                args.handles,
+                stats_scraper.validate_act_id(args.act_id),
+            )
+            sys.exit(0)
+
+        if args.command == "imports":
+            offenders = 0
+            for module in STARTUP_MODULES:
+                heavy = heavy_imports(module)
+                offenders += len(heavy)
+                print(f"{module:<24} {', '.join(heavy) or 'ok'}")
+            sys.exit(1 if offenders else 0)
+
+        fixtures = generate_fixtures()
+        if args.fixtures:
+            load_fixtures(args.fixtures, fixtures)
+
+        if args.command == "list":
+            for name in build_cases(fixtures, args.browser):
+                print(name)
+
+        elif args.command == "run":
+            if asyncio.run(print_results(args, fixtures)):
+                sys.exit(1)
+
+    except ValueError as e:
+        print(f"[BENCH] Validation error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"[BENCH] Internal error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,38 @@
+import bisect
+import hashlib
+
+RING_REPLICAS = 64
+
+
+def ring_hash(key: str) -> int:
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8)
+    return int.from_bytes(digest.digest(), "little")
+
+
+class HashRing:
+    """Consistent-hash ring mapping keys onto ``nodes`` shard indexes.
+
+    Each node gets ``replicas`` points on the ring, so adding or removing a
+    node only moves roughly ``1 / nodes`` of the keys.
+    """
+
+    def __init__(self, nodes: int, replicas: int = RING_REPLICAS):
+        if nodes < 1:
+            raise ValueError("A hash ring needs at least one node")
+
+        self.nodes = nodes
+        points = sorted(
+            (ring_hash(f"{node}:{replica}"), node)
+            for node in range(nodes)
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: str) -> int:
+        i = bisect.bisect(self._hashes, ring_hash(key)) % len(self._hashes)
+        return self._owners[i]
+
+
+def page_key(region: str, page: int) -> str:
+    return f"{region}:{page}"
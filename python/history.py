@@ -0,0 +1,571 @@
+import os
+import sys
+import json
+import time
+import fcntl
+import array
+import shutil
+import sqlite3
+import threading
+import argparse
+import datetime
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+HISTORY_DIR = os.environ.get("LEADERBOARD_HISTORY_DIR", "data/history")
+# How far before ``since`` a query looks for each player's baseline rank.
+HISTORY_LOOKBACK_DAYS = float(os.environ.get("LEADERBOARD_HISTORY_LOOKBACK_DAYS", "30"))
+
+# Layout under HISTORY_DIR:
+#   players.sqlite3                     interned Riot IDs (id -> riotId)
+#   <region>/<act_id>/<YYYY-MM-DD>/     one partition per UTC day
+#       log.bin                         appended rows of u32 (ts, rank, player)
+#       current                         names the live columns-<n> directory
+#       columns-<n>/                    one generation of compacted rows
+#           ts.npy, rank.npy, player.npy    the rows as time-sorted columns
+#           log.bin                     a log set aside while it is folded in
+# Each page snapshot is appended with a single O_APPEND write, so concurrent
+# shards never interleave partial rows. ``compact`` turns finished days into
+# sorted columns; queries read columns and any remaining logs together.
+LOG_NAME = "log.bin"
+CURRENT_NAME = "current"
+GENERATION_PREFIX = "columns-"
+COLUMNS = ("ts", "rank", "player")
+ROW_WIDTH = len(COLUMNS)
+INTERN_CHUNK = 500
+
+_history = None
+_history_lock = threading.Lock()
+_disabled = False
+
+
+def day_of(ts: float) -> str:
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).strftime(
+        "%Y-%m-%d"
+    )
+
+
+def parse_since(spec: str) -> float:
+    """A timestamp from ``24h``/``7d``/``90m`` ago, an ISO date or time, or epoch seconds."""
+    spec = spec.strip()
+    units = {"m": 60, "h": 3600, "d": 86400}
+    if spec[-1:] in units and spec[:-1].replace(".", "", 1).isdigit():
+        return time.time() - float(spec[:-1]) * units[spec[-1]]
+    try:
+        return float(spec)
+    except ValueError:
+        pass
+
+    moment = datetime.datetime.fromisoformat(spec)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return moment.timestamp()
+
+
+def numpy():
+    """NumPy, imported on first query so the scrapers' write path stays light."""
+    try:
+        import numpy
+    except ImportError:
+        raise ValueError("History queries need the numpy package installed")
+    return numpy
+
+
+def last_occurrence(keys: "np.ndarray"):
+    """Unique keys and the index of each one's last occurrence in ``keys``."""
+    np = numpy()
+    unique, first_from_end = np.unique(keys[::-1], return_index=True)
+    return unique, len(keys) - 1 - first_from_end
+
+
+class PlayerIds:
+    """Interns Riot IDs as small integers, shared by every writer process."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS players (id INTEGER PRIMARY KEY, riot_id TEXT NOT NULL UNIQUE)"
+        )
+        self._ids: dict[str, int] = {}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def ids(self, riot_ids: list[str]) -> list[int]:
+        with self._lock:
+            missing = list({r for r in riot_ids if r not in self._ids})
+            for start in range(0, len(missing), INTERN_CHUNK):
+                chunk = missing[start : start + INTERN_CHUNK]
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO players (riot_id) VALUES (?)",
+                    [(riot_id,) for riot_id in chunk],
+                )
+                placeholders = ",".join("?" * len(chunk))
+                for player_id, riot_id in self._db.execute(
+                    f"SELECT id, riot_id FROM players WHERE riot_id IN ({placeholders})",
+                    chunk,
+                ):
+                    self._ids[riot_id] = player_id
+            return [self._ids[r] for r in riot_ids]
+
+    def lookup(self, riot_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id FROM players WHERE riot_id = ?", (riot_id,)
+            ).fetchone()
+            if row is None:
+                row = self._db.execute(
+                    "SELECT id FROM players WHERE riot_id = ? COLLATE NOCASE",
+                    (riot_id,),
+                ).fetchone()
+        return row[0] if row else None
+
+    def names(self, player_ids) -> dict[int, str]:
+        wanted = [int(p) for p in player_ids]
+        names = {}
+        with self._lock:
+            for start in range(0, len(wanted), INTERN_CHUNK):
+                chunk = wanted[start : start + INTERN_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                names.update(
+                    self._db.execute(
+                        f"SELECT id, riot_id FROM players WHERE id IN ({placeholders})",
+                        chunk,
+                    )
+                )
+        return names
+
+
+class HistoryStore:
+    """Append-only leaderboard snapshots with vectorized rank-movement queries.
+
+    Every scraped page adds one ``(timestamp, rank, player id)`` row per entry
+    to its region/act/day partition. Queries load the relevant partitions as
+    NumPy columns and answer with array operations rather than Python loops:
+    the latest observation per player or rank slot is a ``np.unique`` over the
+    time-ordered rows.
+    """
+
+    def __init__(self, root: str = HISTORY_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.players = PlayerIds(os.path.join(root, "players.sqlite3"))
+
+    def close(self):
+        self.players.close()
+
+    def partition_dir(self, region: str, act_id: str, day: str) -> str:
+        return os.path.join(self.root, region, act_id, day)
+
+    def append(
+        self, region: str, act_id: str, items: list[dict], ts: Optional[float] = None
+    ) -> int:
+        """Record one page snapshot. Returns the number of rows written."""
+        ts = time.time() if ts is None else ts
+        entries = [
+            (item["rank"], item["riotId"])
+            for item in items
+            if isinstance(item, dict)
+            and isinstance(item.get("rank"), int)
+            and isinstance(item.get("riotId"), str)
+            and item["riotId"]
+        ]
+        if not entries:
+            return 0
+
+        player_ids = self.players.ids([riot_id for _, riot_id in entries])
+        rows = array.array("I")
+        for (rank, _), player_id in zip(entries, player_ids):
+            rows.extend((int(ts), rank, player_id))
+        if sys.byteorder == "big":
+            rows.byteswap()
+
+        directory = self.partition_dir(region, act_id, day_of(ts))
+        os.makedirs(directory, exist_ok=True)
+        log_path = os.path.join(directory, LOG_NAME)
+        while True:
+            fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                # Shared with other writers; compaction takes it exclusively
+                # once it has set the log aside, so a write either finishes
+                # before the log is folded or sees it was moved and reopens.
+                fcntl.flock(fd, fcntl.LOCK_SH)
+                try:
+                    current = os.path.samestat(os.fstat(fd), os.stat(log_path))
+                except FileNotFoundError:
+                    current = False
+                if current:
+                    os.write(fd, rows.tobytes())
+                    return len(entries)
+            finally:
+                os.close(fd)
+
+    def days(self, region: str, act_id: str) -> list[str]:
+        directory = os.path.join(self.root, region, act_id)
+        try:
+            return sorted(os.listdir(directory))
+        except FileNotFoundError:
+            return []
+
+    def current_generation(self, directory: str) -> Optional[str]:
+        """The partition's live generation directory, if it was ever compacted."""
+        try:
+            with open(os.path.join(directory, CURRENT_NAME)) as f:
+                return os.path.join(directory, f.read().strip())
+        except FileNotFoundError:
+            return None
+
+    def read_files(self, generation: Optional[str], log_paths: list[str]) -> list[list]:
+        """One list of arrays per column: a generation's columns, then the logs.
+
+        A log reached under two paths, because it was set aside in between,
+        is only read once.
+        """
+        np = numpy()
+        columns = [[] for _ in COLUMNS]
+        if generation is not None:
+            for i, name in enumerate(COLUMNS):
+                path = os.path.join(generation, f"{name}.npy")
+                columns[i].append(np.load(path, mmap_mode="r"))
+
+        seen = set()
+        for log_path in log_paths:
+            try:
+                f = open(log_path, "rb")
+            except FileNotFoundError:
+                continue
+            with f:
+                info = os.fstat(f.fileno())
+                if (info.st_dev, info.st_ino) in seen:
+                    continue
+                seen.add((info.st_dev, info.st_ino))
+                log = np.fromfile(f, dtype="<u4")
+            # A writer may be mid-append; ignore a trailing partial row.
+            log = log[: len(log) - len(log) % ROW_WIDTH].reshape(-1, ROW_WIDTH)
+            for i in range(ROW_WIDTH):
+                columns[i].append(log[:, i])
+        return columns
+
+    def read_partition(self, directory: str) -> list[list]:
+        """A partition's live columns, its set-aside log and its log.
+
+        The log is read before the set-aside log, so one moved aside in
+        between is still read once. A compaction that retires the generation
+        mid-read makes the read start over on the new one.
+        """
+        while True:
+            generation = self.current_generation(directory)
+            log_paths = [os.path.join(directory, LOG_NAME)]
+            if generation is not None:
+                log_paths.append(os.path.join(generation, LOG_NAME))
+            try:
+                columns = self.read_files(generation, log_paths)
+            except FileNotFoundError:
+                if self.current_generation(directory) == generation:
+                    raise
+                continue
+            if self.current_generation(directory) == generation:
+                return columns
+
+    def load(self, region: str, act_id: str, since: Optional[float] = None):
+        """``(ts, rank, player)`` columns in time order, from ``since`` onward."""
+        np = numpy()
+        first_day = day_of(since) if since is not None else ""
+        columns = [[] for _ in COLUMNS]
+        for day in self.days(region, act_id):
+            if day >= first_day:
+                directory = self.partition_dir(region, act_id, day)
+                for i, parts in enumerate(self.read_partition(directory)):
+                    columns[i].extend(parts)
+
+        ts, rank, player = (
+            np.concatenate(parts) if parts else np.empty(0, dtype="<u4")
+            for parts in columns
+        )
+        order = np.argsort(ts, kind="stable")
+        if since is not None:
+            order = order[ts[order] >= since]
+        return ts[order], rank[order].astype(np.int64), player[order]
+
+    def climbers(self, region: str, act_id: str, since: float, limit: int = 20):
+        """Players who gained the most ranks between ``since`` and their latest snapshot."""
+        np = numpy()
+        ts, rank, player = self.load(
+            region, act_id, since - HISTORY_LOOKBACK_DAYS * 86400
+        )
+        before = ts <= since
+        if not before.any():
+            return []
+
+        then_players, then_at = last_occurrence(player[before])
+        then_rank = rank[before][then_at]
+        now_players, now_at = last_occurrence(player)
+        now_rank = rank[now_at]
+
+        common, then_i, now_i = np.intersect1d(
+            then_players, now_players, assume_unique=True, return_indices=True
+        )
+        gained = then_rank[then_i] - now_rank[now_i]
+        order = np.argsort(-gained, kind="stable")[:limit]
+        order = order[gained[order] > 0]
+
+        names = self.players.names(common[order])
+        return [
+            {
+                "riotId": names.get(int(common[i])),
+                "from": int(then_rank[then_i[i]]),
+                "to": int(now_rank[now_i[i]]),
+                "gained": int(gained[i]),
+            }
+            for i in order
+        ]
+
+    def rank_history(
+        self, region: str, act_id: str, riot_id: str, since: Optional[float] = None
+    ):
+        """Every recorded ``(timestamp, rank)`` for one player."""
+        player_id = self.players.lookup(riot_id)
+        if player_id is None:
+            return []
+        ts, rank, player = self.load(region, act_id, since)
+        mine = player == player_id
+        return [
+            {"timestamp": int(t), "rank": int(r)}
+            for t, r in zip(ts[mine].tolist(), rank[mine].tolist())
+        ]
+
+    def top_changes(self, region: str, act_id: str, top: int, since: float):
+        """Players who entered or left the top ``top`` ranks since ``since``."""
+        np = numpy()
+        ts, rank, player = self.load(
+            region, act_id, since - HISTORY_LOOKBACK_DAYS * 86400
+        )
+
+        def top_at(mask):
+            ranks, players = rank[mask], player[mask]
+            latest_players, latest_at = last_occurrence(players)
+            still_top = latest_players[ranks[latest_at] <= top]
+            in_top = ranks <= top
+            _, slot_at = last_occurrence(ranks[in_top])
+            occupants = players[in_top][slot_at]
+            return np.unique(occupants[np.isin(occupants, still_top)])
+
+        then = top_at(ts <= since)
+        now = top_at(np.ones(len(ts), dtype=bool))
+        entered = np.setdiff1d(now, then, assume_unique=True)
+        left = np.setdiff1d(then, now, assume_unique=True)
+
+        latest_players, latest_at = last_occurrence(player)
+        latest_rank = dict(zip(latest_players.tolist(), rank[latest_at].tolist()))
+        names = self.players.names(np.concatenate([entered, left]))
+
+        def describe(player_ids):
+            rows = [
+                {"riotId": names.get(p), "rank": latest_rank[p]}
+                for p in player_ids.tolist()
+            ]
+            return sorted(rows, key=lambda row: row["rank"])
+
+        return {"entered": describe(entered), "left": describe(left)}
+
+    def set_current(self, directory: str, generation: str):
+        tmp_path = os.path.join(directory, f"{CURRENT_NAME}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(os.path.basename(generation))
+        os.replace(tmp_path, os.path.join(directory, CURRENT_NAME))
+
+    def fold_log(self, directory: str, generation: str):
+        """Write a generation's columns and set-aside log as the next generation.
+
+        Readers switch to it with the single rename in ``set_current``, so
+        they see either the old columns with the set-aside log or the new
+        columns without it, never a mix.
+        """
+        np = numpy()
+        ts, rank, player = (
+            np.concatenate(parts)
+            for parts in self.read_files(
+                generation, [os.path.join(generation, LOG_NAME)]
+            )
+        )
+        order = np.argsort(ts, kind="stable")
+
+        number = int(os.path.basename(generation)[len(GENERATION_PREFIX) :]) + 1
+        folded = os.path.join(directory, f"{GENERATION_PREFIX}{number}")
+        os.makedirs(folded)
+        for name, column in zip(COLUMNS, (ts, rank, player)):
+            np.save(os.path.join(folded, f"{name}.npy"), column[order])
+        self.set_current(directory, folded)
+        shutil.rmtree(generation)
+
+    def compact_partition(self, directory: str):
+        """Fold a partition's log into its columns.
+
+        The log is moved into the live generation before it is read, so rows
+        appended while compacting land in a fresh log instead of being
+        deleted with the old one.
+        """
+        np = numpy()
+        generation = self.current_generation(directory)
+        # Generations an interrupted run wrote or failed to remove.
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.startswith(GENERATION_PREFIX) and path != generation:
+                shutil.rmtree(path)
+
+        if generation is None:
+            generation = os.path.join(directory, f"{GENERATION_PREFIX}0")
+            os.makedirs(generation)
+            for name in COLUMNS:
+                np.save(
+                    os.path.join(generation, f"{name}.npy"), np.empty(0, dtype="<u4")
+                )
+            self.set_current(directory, generation)
+
+        # The first pass may only finish a log an interrupted run set aside.
+        for _ in range(2):
+            set_aside = os.path.join(generation, LOG_NAME)
+            if not os.path.exists(set_aside):
+                log_path = os.path.join(directory, LOG_NAME)
+                if not os.path.exists(log_path):
+                    return
+                os.replace(log_path, set_aside)
+            # Wait out appends that opened the log before it moved.
+            fd = os.open(set_aside, os.O_RDONLY)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            finally:
+                os.close(fd)
+            self.fold_log(directory, generation)
+            generation = self.current_generation(directory)
+
+    def compact(self, before_day: Optional[str] = None) -> int:
+        """Rewrite finished day partitions as sorted columns. Returns partitions done."""
+        before_day = before_day or day_of(time.time())
+        compacted = 0
+
+        for region in sorted(os.listdir(self.root)):
+            region_dir = os.path.join(self.root, region)
+            if not os.path.isdir(region_dir):
+                continue
+            for act_id in sorted(os.listdir(region_dir)):
+                for day in self.days(region, act_id):
+                    directory = self.partition_dir(region, act_id, day)
+                    generation = self.current_generation(directory)
+                    pending = os.path.exists(os.path.join(directory, LOG_NAME)) or (
+                        generation is not None
+                        and os.path.exists(os.path.join(generation, LOG_NAME))
+                    )
+                    if day >= before_day or not pending:
+                        continue
+
+                    self.compact_partition(directory)
+                    compacted += 1
+        return compacted
+
+
+def get_history() -> Optional[HistoryStore]:
+    global _history
+
+    with _history_lock:
+        if _history is None and HISTORY_DIR:
+            _history = HistoryStore(HISTORY_DIR)
+    return _history
+
+
+def record_snapshot(region: str, act_id: str, items: list[dict]):
+    """Append a scraped page to the history store. Never raises.
+
+    Storage errors disable recording for the rest of the process; anything
+    else only skips this snapshot. Safe to call from worker threads.
+    """
+    global _disabled
+
+    if _disabled:
+        return
+    try:
+        history = get_history()
+        if history is not None:
+            history.append(region, act_id, items)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[HISTORY] Snapshot write failed, disabling: {e}", file=sys.stderr)
+        _disabled = True
+    except Exception as e:
+        print(f"[HISTORY] Snapshot skipped: {e}", file=sys.stderr)
+
+
+def main(argv: Optional[list[str]] = None):
+    from leaderboard_scraper import ACT_ID, validate_act_id, validate_region
+
+    parser = argparse.ArgumentParser(description="Leaderboard snapshot history")
+    parser.add_argument(
+        "--dir", type=str, default=HISTORY_DIR, help="History directory"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    climbers_parser = subparsers.add_parser(
+        "climbers", help="Players who gained the most ranks since a time"
+    )
+    climbers_parser.add_argument("region", type=str, help="Server region")
+    climbers_parser.add_argument("--act-id", type=str, default=ACT_ID)
+    climbers_parser.add_argument(
+        "--since", type=parse_since, required=True, help="e.g. 24h, 7d, 2026-10-01"
+    )
+    climbers_parser.add_argument("--limit", type=int, default=20)
+
+    player_parser = subparsers.add_parser("player", help="Rank history of a player")
+    player_parser.add_argument("region", type=str, help="Server region")
+    player_parser.add_argument("riot_id", type=str, help="Player Riot ID")
+    player_parser.add_argument("--act-id", type=str, default=ACT_ID)
+    player_parser.add_argument("--since", type=parse_since)
+
+    top_parser = subparsers.add_parser(
+        "top", help="Entries to and exits from the top N since a time"
+    )
+    top_parser.add_argument("region", type=str, help="Server region")
+    top_parser.add_argument("--act-id", type=str, default=ACT_ID)
+    top_parser.add_argument("--n", type=int, default=100, help="Size of the top")
+    top_parser.add_argument(
+        "--since", type=parse_since, required=True, help="e.g. 24h, 7d, 2026-10-01"
+    )
+
+    compact_parser = subparsers.add_parser(
+        "compact", help="Turn finished day partitions into columns"
+    )
+    compact_parser.add_argument(
+        "--before", type=str, help="Compact days before this one (default today, UTC)"
+    )
+
+    args = parser.parse_args(argv)
+
+    try:
+        store = HistoryStore(args.dir)
+        if args.command == "compact":
+            result = {"compacted": store.compact(args.before)}
+        else:
+            region = validate_region(args.region)
+            act_id = validate_act_id(args.act_id)
+            if args.command == "climbers":
+                result = store.climbers(region, act_id, args.since, max(1, args.limit))
+            elif args.command == "player":
+                result = store.rank_history(region, act_id, args.riot_id, args.since)
+            else:
+                result = store.top_changes(region, act_id, max(1, args.n), args.since)
+        store.close()
+        print(json.dumps(result))
+
+    except (ValueError, OSError) as e:
+        print(f"[HISTORY] Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"[HISTORY] Internal error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,140 @@
 import sys
+import os
 import json
 import argparse
 import re
 import urllib.parse
+import time
 import asyncio
-from typing import Literal, Optional
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
-
-
-ACT_ID = "4c4b8cff-43eb-13d3-8f14-96b783c90cd2"
+import itertools
+from typing import TYPE_CHECKING, Literal, Optional
+from history import record_snapshot
+from leaderboard_store import LeaderboardStore
+from metrics import metrics
+from output import add_format_argument, open_writer
+from prefetch import Prefetcher
+from outbound import (
+    BACKGROUND,
+    BLOCK_STATUSES,
+    INTERACTIVE,
+    SITE_HOST,
+    curl_requests,
+    host_of,
+    scheduler,
+)
+from hashring import HashRing, page_key
+from singleflight import AsyncSingleFlight
+from tracker_parse import (
+    LeaderboardStream,
+    extract_leaderboard_items,
+    is_challenge_page,
+    parse_leaderboard_rows,
+)
+
+if TYPE_CHECKING:
+    from curl_cffi.requests import AsyncSession
+    from playwright.async_api import Browser, BrowserContext, Page
+
+LEADERBOARD_URL = os.environ.get(
+    "TRACKER_LEADERBOARD_URL",
+    "https://tracker.gg/valorant/leaderboards/ranked/all/default",
+)
+ACT_ID = os.environ.get("VALORANT_ACT_ID", "4c4b8cff-43eb-13d3-8f14-96b783c90cd2")
 AllowedRegion = Literal["na", "eu", "ap", "kr", "br", "latam"]
 ALLOWED_REGIONS: tuple[AllowedRegion, ...] = ("na", "eu", "ap", "kr", "br", "latam")
+TAB_POOL_SIZE = int(os.environ.get("LEADERBOARD_TAB_POOL_SIZE", "4"))
+HTTP_FIRST = os.environ.get("LEADERBOARD_HTTP_FIRST", "1") != "0"
+HTTP_IMPERSONATE = "chrome120"
+CACHE_TTL = float(os.environ.get("LEADERBOARD_CACHE_TTL", "21600"))
+REFRESH_INTERVAL = float(os.environ.get("LEADERBOARD_REFRESH_INTERVAL", "900"))
+REFRESH_BUDGET = int(os.environ.get("LEADERBOARD_REFRESH_BUDGET", "20"))
+REFRESH_MIN_AGE = float(os.environ.get("LEADERBOARD_REFRESH_MIN_AGE", "1800"))
+REFRESH_TOP_PAGES = int(os.environ.get("LEADERBOARD_REFRESH_TOP_PAGES", "5"))
+BATCH_CONCURRENCY = int(os.environ.get("LEADERBOARD_BATCH_CONCURRENCY", "8"))
+# Predictive prefetch in serve mode: every PREFETCH_INTERVAL seconds with no
+# user request in flight, warm up to PREFETCH_BUDGET pages that are missing
+# from the store or expire within PREFETCH_LEAD seconds.
+PREFETCH_INTERVAL = float(os.environ.get("LEADERBOARD_PREFETCH_INTERVAL", "30"))
+PREFETCH_BUDGET = int(os.environ.get("LEADERBOARD_PREFETCH_BUDGET", "4"))
+PREFETCH_LEAD = float(os.environ.get("LEADERBOARD_PREFETCH_LEAD", "1800"))
+LEADERBOARD_SHARDS = int(os.environ.get("LEADERBOARD_SHARDS", "1"))
+BROWSER_PROBE_INTERVAL = float(
+    os.environ.get("LEADERBOARD_BROWSER_PROBE_INTERVAL", "30")
+)
+BROWSER_PROBE_TIMEOUT = 5.0
+# Fresh context after this many tab checkouts, full restart above this RSS.
+BROWSER_RECYCLE_PAGES = int(os.environ.get("LEADERBOARD_BROWSER_RECYCLE_PAGES", "500"))
+BROWSER_MAX_RSS_MB = float(os.environ.get("LEADERBOARD_BROWSER_MAX_RSS_MB", "1500"))
+
+# Request interception: resource types never loaded, hosts treated as first
+# party (subdomains included), and third-party hosts still let through.
+BLOCKED_RESOURCE_TYPES = os.environ.get(
+    "LEADERBOARD_BLOCKED_TYPES",
+    "image,font,media,stylesheet,texttrack,manifest,ping,eventsource,websocket",
+)
+FIRST_PARTY_HOSTS = os.environ.get("LEADERBOARD_FIRST_PARTY_HOSTS", SITE_HOST)
+ALLOWED_THIRD_PARTY_HOSTS = os.environ.get(
+    "LEADERBOARD_ALLOWED_HOSTS", "challenges.cloudflare.com"
+)
+BLOCK_THIRD_PARTY = os.environ.get("LEADERBOARD_BLOCK_THIRD_PARTY", "1") != "0"
+STOP_ON_STATE = os.environ.get("LEADERBOARD_STOP_ON_STATE", "1") != "0"
+# Cookies and storage (Cloudflare clearance included) kept across contexts and
+# processes. Empty disables persistence.
+STORAGE_STATE_PATH = os.environ.get(
+    "LEADERBOARD_STORAGE_STATE_PATH", "data/browser-state.json"
+)
+CHALLENGE_TIMEOUT = float(os.environ.get("LEADERBOARD_CHALLENGE_TIMEOUT", "15"))
+
+# Resolves once the inline state has run, or the document finished parsing
+# without it (challenge pages, DOM-only markup).
+STATE_OR_PARSED_SCRIPT = """
+() => window.__INITIAL_STATE__ !== undefined || document.readyState !== "loading"
+"""
+# Resolves once a challenge has handed over to the real page: the state has
+# arrived, or a non-challenge document has finished parsing.
+CHALLENGE_CLEARED_SCRIPT = """
+() => window.__INITIAL_STATE__ !== undefined || (
+    document.readyState !== "loading" &&
+    !/Just a moment|Attention Required/.test(document.title)
+)
+"""
+STOP_IF_STATE_SCRIPT = """
+() => {
+    if (window.__INITIAL_STATE__ === undefined) return false;
+    window.stop();
+    return true;
+}
+"""
+
+# Collects [profile href, first cell text] for every row in one round trip.
+EXTRACT_ROWS_SCRIPT = """
+() => Array.from(document.querySelectorAll("tr")).flatMap((row) => {
+    const link = row.querySelector('a[href*="/valorant/profile/"]');
+    if (!link) return [];
+    const cell = row.querySelector("td");
+    return [[link.getAttribute("href"), cell ? cell.textContent : null]];
+})
+"""
+PROFILE_HREF_PATTERN = re.compile(r"/valorant/profile/riot/([^/]+)")
+RANK_TEXT_PATTERN = re.compile(r"\d+")
 
 _playwright = None
-_browser: Optional[Browser] = None
-_context: Optional[BrowserContext] = None
-_pending_scrapes = set()
+_browser: Optional["Browser"] = None
+_context: Optional["BrowserContext"] = None
+_idle_tabs: list["Page"] = []
+_tab_slots: Optional[asyncio.Semaphore] = None
+_browser_lock: Optional[asyncio.Lock] = None
+_browser_healthy = False
+_context_pages = 0
+_recycling = False
+_scrapes = AsyncSingleFlight()
+_store: Optional[LeaderboardStore] = None
+_prefetcher = Prefetcher()
+# User-facing page lookups in flight; prefetching waits for this to be zero.
+_interactive_requests = 0
+_http_session: Optional["AsyncSession"] = None
+# (index, count) when running as one shard under shard_supervisor.
+_shard: Optional[tuple[int, int]] = None
 
 
 def validate_region(region: str) -> AllowedRegion:
@@ -34,6 +153,58 @@ def validate_act_id(act_id: str) -> str:
     return act_id
 
 
+def split_setting(value: str) -> frozenset[str]:
+    return frozenset(part.strip().lower() for part in value.split(",") if part.strip())
+
+
+class InterceptionPolicy:
+    """Decides which requests a leaderboard tab may make.
+
+    Blocked resource types are aborted everywhere. First-party hosts (and
+    their subdomains) may load anything else; third-party hosts are aborted
+    unless listed in ``allowed_hosts`` or third-party blocking is off.
+    """
+
+    def __init__(
+        self,
+        blocked_types: frozenset[str],
+        first_party: frozenset[str],
+        allowed_hosts: frozenset[str],
+        block_third_party: bool = True,
+    ):
+        self.blocked_types = blocked_types
+        self.first_party = first_party
+        self.allowed_hosts = allowed_hosts
+        self.block_third_party = block_third_party
+
+    @classmethod
+    def from_env(cls, *extra_first_party: Optional[str]):
+        first_party = split_setting(FIRST_PARTY_HOSTS) | {
+            host.lower() for host in extra_first_party if host
+        }
+        return cls(
+            split_setting(BLOCKED_RESOURCE_TYPES),
+            frozenset(first_party),
+            split_setting(ALLOWED_THIRD_PARTY_HOSTS),
+            BLOCK_THIRD_PARTY,
+        )
+
+    @staticmethod
+    def matches(host: str, domains: frozenset[str]) -> bool:
+        return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+    def allows(self, url: str, resource_type: str) -> bool:
+        if resource_type in self.blocked_types:
+            return False
+        if not self.block_third_party or url.startswith(("data:", "blob:")):
+            return True
+
+        host = (host_of(url) or "").lower()
+        return self.matches(host, self.first_party) or self.matches(
+            host, self.allowed_hosts
+        )
+
+
 def get_browser_args():
     return [
         "--no-sandbox",
@@ -63,9 +234,33 @@ def get_extra_headers():
     }
 
 
-async def reset_browser():
-    global _playwright, _browser, _context
+async def save_storage_state():
+    """Write the context's cookies and storage to ``STORAGE_STATE_PATH``."""
+    if not STORAGE_STATE_PATH or _context is None or not browser_is_healthy():
+        return
 
+    directory = os.path.dirname(STORAGE_STATE_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{STORAGE_STATE_PATH}.{os.getpid()}.tmp"
+    try:
+        await asyncio.wait_for(
+            _context.storage_state(path=tmp_path), BROWSER_PROBE_TIMEOUT
+        )
+        os.replace(tmp_path, STORAGE_STATE_PATH)
+    except Exception as e:
+        print(f"[LEADERBOARD] Saving storage state failed: {e}", file=sys.stderr)
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+async def close_context():
+    global _context, _context_pages
+
+    _idle_tabs.clear()
+    _context_pages = 0
+
+    await save_storage_state()
     try:
         if _context:
             await _context.close()
@@ -74,6 +269,13 @@ async def reset_browser():
 
     _context = None
 
+
+async def reset_browser():
+    global _playwright, _browser, _browser_healthy
+
+    await close_context()
+    _browser_healthy = False
+
     try:
         if _browser:
             await _browser.close()
@@ -93,42 +295,164 @@ async def reset_browser():
     print("[LEADERBOARD] Browser reset complete", file=sys.stderr)
 
 
-async def check_browser_health() -> bool:
+def browser_is_healthy() -> bool:
+    """Cheap check kept current by the disconnect listener; no round trip."""
+    return _browser_healthy and _browser is not None and _browser.is_connected()
+
+
+def on_browser_disconnected(_):
+    global _browser_healthy
+
+    _browser_healthy = False
+    metrics.incr("browser_disconnects")
+    print("[LEADERBOARD] Browser disconnected", file=sys.stderr)
+
+
+async def on_tab_crashed(tab: "Page"):
+    metrics.incr("tab_crashes")
+    print("[LEADERBOARD] Tab crashed, dropping it from the pool", file=sys.stderr)
+    if tab in _idle_tabs:
+        _idle_tabs.remove(tab)
     try:
-        if _playwright is None or _browser is None or _context is None:
-            return False
+        await tab.close()
+    except Exception:
+        pass
 
-        if not _browser.is_connected():
-            return False
 
-        test_page = await _context.new_page()
-        await test_page.goto("about:blank", timeout=5000)
-        await test_page.close()
+async def probe_browser() -> bool:
+    """One protocol round trip to the context, without opening a tab."""
+    if not browser_is_healthy():
+        return False
+    if _context is None:
+        return True
+
+    try:
+        with metrics.span("browser_probe"):
+            await asyncio.wait_for(_context.cookies(), BROWSER_PROBE_TIMEOUT)
         return True
     except Exception as e:
-        print(f"[LEADERBOARD] Browser health check failed: {e}", file=sys.stderr)
+        print(f"[LEADERBOARD] Browser probe failed: {e}", file=sys.stderr)
         return False
 
 
+def browser_rss_mb() -> Optional[float]:
+    """Resident memory of this process's descendants (driver and Chromium), Linux only."""
+    try:
+        parents = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                parents[int(entry)] = int(fields[1])
+            except (OSError, IndexError, ValueError):
+                continue
+    except OSError:
+        return None
+
+    descendants = set()
+    frontier = [os.getpid()]
+    while frontier:
+        parent = frontier.pop()
+        children = [pid for pid, ppid in parents.items() if ppid == parent]
+        descendants.update(children)
+        frontier.extend(children)
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for pid in descendants:
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total / (1024 * 1024)
+
+
+async def recycle_browser(reason: str, restart: bool):
+    """Wait for every checked-out tab to come back, then drop the context.
+
+    With ``restart`` the whole browser goes too. The replacement is created
+    lazily by the next ``acquire_tab``.
+    """
+    global _recycling
+
+    if _recycling:
+        return
+    _recycling = True
+
+    slots = get_tab_slots()
+    held = 0
+    try:
+        for _ in range(max(1, TAB_POOL_SIZE)):
+            await slots.acquire()
+            held += 1
+
+        print(f"[LEADERBOARD] Recycling browser: {reason}", file=sys.stderr)
+        metrics.incr("browser_recycles", reason=reason)
+        if restart:
+            await reset_browser()
+        else:
+            await close_context()
+    finally:
+        for _ in range(held):
+            slots.release()
+        _recycling = False
+
+
+async def monitor_browser(interval: float):
+    """Background health probe and memory watchdog for the shared browser."""
+    while True:
+        await asyncio.sleep(interval)
+        if _browser is None:
+            continue
+
+        try:
+            if not await probe_browser():
+                await recycle_browser("unhealthy", restart=True)
+                continue
+
+            rss = browser_rss_mb()
+            if rss is not None and rss > BROWSER_MAX_RSS_MB:
+                await recycle_browser(f"memory {rss:.0f}MB", restart=True)
+        except Exception as e:
+            print(f"[LEADERBOARD] Browser monitor failed: {e}", file=sys.stderr)
+
+
 async def get_browser_context():
-    global _playwright, _browser, _context
+    global _browser_lock
+
+    if _context is not None:
+        return _context
+
+    if _browser_lock is None:
+        _browser_lock = asyncio.Lock()
+
+    async with _browser_lock:
+        if _context is not None:
+            return _context
+        with metrics.span("context_create"):
+            return await launch_browser_context()
+
+
+async def launch_browser_context():
+    global _playwright, _browser, _context, _browser_healthy
 
     if _playwright is None:
+        from playwright.async_api import async_playwright
+
         _playwright = await async_playwright().start()
 
     if _browser is None:
         _browser = await _playwright.chromium.launch(
             headless=True, args=get_browser_args()
         )
+        _browser.on("disconnected", on_browser_disconnected)
+        _browser_healthy = True
 
     if _context is None:
-        _context = await _browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent=get_user_agent(),
-            locale="en-US",
-            timezone_id="America/New_York",
-            extra_http_headers=get_extra_headers(),
-        )
+        _context = await new_browser_context(_browser)
 
         await _context.add_init_script("""
             Object.defineProperty(navigator, 'webdriver', { get: () => false });
@@ -148,133 +472,353 @@ async def get_browser_context():
             });
         """)
 
-        await _context.route(
-            "**/*.{png,jpg,jpeg,gif,svg,ico,woff,woff2,ttf,eot}", block_resources
-        )
+        policy = InterceptionPolicy.from_env(host_of(LEADERBOARD_URL))
+
+        async def intercept(route):
+            await apply_policy(policy, route)
+
+        await _context.route("**/*", intercept)
+        _context.on("page", lambda tab: tab.on("crash", on_tab_crashed))
 
     return _context
 
 
-async def block_resources(route):
-    resource_type = route.request.resource_type
-    if resource_type in ["image", "font", "media"]:
-        await route.abort()
-    else:
-        await route.continue_()
+async def new_browser_context(browser: "Browser") -> "BrowserContext":
+    """A fresh context, seeded with the saved storage state if there is one."""
+    options = dict(
+        viewport={"width": 1920, "height": 1080},
+        user_agent=get_user_agent(),
+        locale="en-US",
+        timezone_id="America/New_York",
+        extra_http_headers=get_extra_headers(),
+    )
+
+    if STORAGE_STATE_PATH and os.path.exists(STORAGE_STATE_PATH):
+        try:
+            context = await browser.new_context(
+                storage_state=STORAGE_STATE_PATH, **options
+            )
+            print("[LEADERBOARD] Restored saved storage state", file=sys.stderr)
+            return context
+        except Exception as e:
+            print(
+                f"[LEADERBOARD] Ignoring unusable storage state: {e}", file=sys.stderr
+            )
+            try:
+                os.unlink(STORAGE_STATE_PATH)
+            except OSError:
+                pass
+
+    return await browser.new_context(**options)
+
+
+def get_tab_slots() -> asyncio.Semaphore:
+    global _tab_slots
+
+    if _tab_slots is None:
+        _tab_slots = asyncio.Semaphore(max(1, TAB_POOL_SIZE))
+    return _tab_slots
+
 
+async def acquire_tab() -> "Page":
+    """Take a tab from the pool, opening a new one if none is idle."""
+    global _context_pages
+
+    with metrics.span("browser_health"):
+        if _browser is not None and not browser_is_healthy():
+            await recycle_browser("disconnected", restart=True)
+        elif _context is not None and _context_pages >= BROWSER_RECYCLE_PAGES > 0:
+            await recycle_browser(f"{_context_pages} pages", restart=False)
+
+    slots = get_tab_slots()
+    await slots.acquire()
 
-async def parse_initial_state(page_obj: Page):
     try:
-        content = await page_obj.content()
-        match = re.search(
-            r"window\.__INITIAL_STATE__\s*=\s*({.+?});", content, re.DOTALL
-        )
-        if match:
-            json_str = match.group(1)
-            decoder = json.JSONDecoder()
-            data, idx = decoder.raw_decode(json_str)
-            leaderboards = data.get("stats", {}).get("standardLeaderboards", [])
-            if leaderboards:
-                raw_items = leaderboards[0].get("items", [])
-                simplified_items = []
-                for item in raw_items:
-                    rank = item.get("rank")
-                    owner = item.get("owner", {})
-                    metadata = owner.get("metadata", {})
-                    riot_id = (
-                        metadata.get("platformUserHandle")
-                        or metadata.get("platformUserIdentifier")
-                        or owner.get("id")
-                    )
-                    if rank and riot_id:
-                        simplified_items.append({"rank": rank, "riotId": riot_id})
-                return simplified_items
+        _context_pages += 1
+        while _idle_tabs:
+            tab = _idle_tabs.pop()
+            if not tab.is_closed():
+                return tab
+
+        context = await get_browser_context()
+        return await context.new_page()
+    except Exception:
+        slots.release()
+        raise
+
+
+async def release_tab(tab: "Page", reusable: bool = True):
+    try:
+        if reusable and not tab.is_closed() and tab.context is _context:
+            _idle_tabs.append(tab)
+        else:
+            await tab.close()
+    except Exception:
+        pass
+    finally:
+        get_tab_slots().release()
+
+
+async def apply_policy(policy: InterceptionPolicy, route):
+    request = route.request
+    try:
+        if policy.allows(request.url, request.resource_type):
+            await route.continue_()
+        else:
+            metrics.incr("blocked_requests", type=request.resource_type)
+            await route.abort()
+    except Exception:
+        # The tab may have been stopped or closed while the request was pending.
+        pass
+
+
+async def load_leaderboard(tab: "Page", url: str):
+    """Navigate and stop loading once ``__INITIAL_STATE__`` has arrived.
+
+    With ``STOP_ON_STATE`` off this is a plain ``domcontentloaded`` navigation.
+    """
+    if not STOP_ON_STATE:
+        await tab.goto(url, wait_until="domcontentloaded", timeout=20000)
+        return
+
+    await tab.goto(url, wait_until="commit", timeout=20000)
+    await tab.wait_for_function(STATE_OR_PARSED_SCRIPT, timeout=20000)
+    if await tab.evaluate(STOP_IF_STATE_SCRIPT):
+        metrics.incr("stopped_on_state")
+
+
+async def wait_for_clearance(tab: "Page", timeout: float = CHALLENGE_TIMEOUT) -> bool:
+    """Wait until a challenge page hands over to the real page, up to ``timeout``.
+
+    The challenge navigates the tab when it passes, which can interrupt the
+    wait; it is simply resumed in the new document until the deadline.
+    """
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        try:
+            await tab.wait_for_function(
+                CHALLENGE_CLEARED_SCRIPT, timeout=remaining * 1000
+            )
+            break
+        except PlaywrightTimeoutError:
+            return False
+        except Exception as e:
+            if tab.is_closed():
+                raise
+            # Execution context destroyed by the challenge's own navigation.
+            print(f"[DEBUG] Challenge wait interrupted: {e}", file=sys.stderr)
+            await asyncio.sleep(0.05)
+
+    if STOP_ON_STATE and await tab.evaluate(STOP_IF_STATE_SCRIPT):
+        metrics.incr("stopped_on_state")
+    return True
+
+
+async def parse_initial_state(page_obj: "Page"):
+    try:
+        with metrics.span("state_parse", tier="browser"):
+            return extract_leaderboard_items(await page_obj.content())
     except Exception as e:
         print(f"[DEBUG] Failed to parse initial state: {e}", file=sys.stderr)
     return None
 
 
-async def parse_dom(page_obj: Page, page_num: int):
+async def parse_dom(page_obj: "Page", page_num: int):
     try:
-        rows = await page_obj.locator("tr").all()
+        with metrics.span("dom_fallback"):
+            rows = await page_obj.evaluate(EXTRACT_ROWS_SCRIPT)
         items = []
 
-        for i, row in enumerate(rows):
-            try:
-                link = row.locator('a[href*="/valorant/profile/"]').first
-                if await link.count() > 0:
-                    href = await link.get_attribute("href")
-                    if href:
-                        match = re.search(r"/valorant/profile/riot/([^/]+)", href)
-                        if match:
-                            riot_id = urllib.parse.unquote(match.group(1))
-
-                            rank_cell = row.locator("td").first
-                            rank_text = await rank_cell.text_content()
-                            rank_match = (
-                                re.search(r"\d+", rank_text) if rank_text else None
-                            )
-                            rank = int(rank_match.group(0)) if rank_match else 0
-
-                            if rank > 0:
-                                items.append({"rank": rank, "riotId": riot_id})
-            except Exception:
+        for href, rank_text in rows:
+            match = PROFILE_HREF_PATTERN.search(href or "")
+            if not match:
                 continue
+
+            riot_id = urllib.parse.unquote(match.group(1))
+            rank_match = RANK_TEXT_PATTERN.search(rank_text) if rank_text else None
+            rank = int(rank_match.group(0)) if rank_match else 0
+
+            if rank > 0:
+                items.append({"rank": rank, "riotId": riot_id})
         return items if items else None
     except Exception as e:
         print(f"[DEBUG] Failed to parse DOM: {e}", file=sys.stderr)
         return None
 
 
-async def get_leaderboard(region: str, page_num: int, act_id: str = ACT_ID):
-    validated_region = validate_region(region)
-    validated_act_id = validate_act_id(act_id)
+def get_http_session() -> "AsyncSession":
+    global _http_session
 
-    if not isinstance(page_num, int) or page_num < 1 or page_num > 10000:
-        return {"error": "Invalid page number"}
+    if _http_session is None:
+        _http_session = curl_requests().AsyncSession(impersonate=HTTP_IMPERSONATE)
+    return _http_session
 
-    cache_key = f"{region}:{page_num}"
 
-    url = f"https://tracker.gg/valorant/leaderboards/ranked/all/default?platform=pc&region={validated_region}&act={validated_act_id}&page={page_num}"
+async def close_http_session():
+    global _http_session
+
+    if _http_session is not None:
+        try:
+            await _http_session.close()
+        except Exception:
+            pass
+        _http_session = None
 
-    if cache_key in _pending_scrapes:
-        print(
-            f"[LEADERBOARD] Already scraping {cache_key}, skipping...", file=sys.stderr
-        )
-        return {"error": "Service temporarily unavailable"}
+
+async def fetch_leaderboard_http(url: str, page_num: int, priority: int = INTERACTIVE):
+    """Fetch a page over curl_cffi. Returns None when the browser is needed."""
+    headers = {**get_extra_headers(), "User-Agent": get_user_agent()}
+    stream = LeaderboardStream()
+    items = None
 
     try:
-        print(f"[LEADERBOARD] Fetching page {page_num} for {region}", file=sys.stderr)
+        with metrics.span("rate_wait"):
+            await scheduler.acquire_async(SITE_HOST, priority)
+        with metrics.span("http_fetch"):
+            async with get_http_session().stream(
+                "GET", url, headers=headers, timeout=15
+            ) as resp:
+                scheduler.record_status(SITE_HOST, resp.status_code)
+                if resp.status_code != 200:
+                    print(
+                        f"[LEADERBOARD] HTTP fetch got status {resp.status_code}",
+                        file=sys.stderr,
+                    )
+                    if resp.status_code in BLOCK_STATUSES:
+                        metrics.incr("challenges", tier="http")
+                    return None
+
+                async for chunk in resp.aiter_content():
+                    items = stream.feed(chunk)
+                    if items is not None:
+                        break
+    except Exception as e:
+        print(f"[LEADERBOARD] HTTP fetch failed: {e}", file=sys.stderr)
+        metrics.incr("errors", tier="http")
+        return None
+
+    if items is None:
+        items = stream.close()
+    if items:
+        return items
+
+    html = stream.text()
+    if is_challenge_page(html):
+        print("[LEADERBOARD] HTTP fetch hit a Cloudflare challenge", file=sys.stderr)
+        scheduler.record(SITE_HOST, blocked=True)
+        metrics.incr("challenges", tier="http")
+        return None
 
-        _pending_scrapes.add(cache_key)
+    with metrics.span("state_parse", tier="http"):
+        try:
+            items = extract_leaderboard_items(html)
+        except Exception:
+            items = None
+    if items:
+        return items
+
+    with metrics.span("rows_fallback", tier="http"):
+        return parse_leaderboard_rows(html, page_num) or None
+
+
+async def export_cookies_to_http():
+    """Copy the browser's tracker.gg cookies (e.g. cf_clearance) into the HTTP session."""
+    if _context is None:
+        return
 
-        if not await check_browser_health():
+    try:
+        cookies = await _context.cookies("https://tracker.gg")
+    except Exception as e:
+        print(f"[LEADERBOARD] Cookie export failed: {e}", file=sys.stderr)
+        return
+
+    session = get_http_session()
+    for cookie in cookies:
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+            secure=cookie.get("secure", False),
+        )
+
+
+async def scrape_leaderboard(
+    url: str, region: str, page_num: int, priority: int = INTERACTIVE
+):
+    """Tiered fetch: curl_cffi first, the pooled browser only if that fails."""
+    print(f"[LEADERBOARD] Fetching page {page_num} for {region}", file=sys.stderr)
+
+    if HTTP_FIRST:
+        items = await fetch_leaderboard_http(url, page_num, priority)
+        if items:
             print(
-                "[LEADERBOARD] Browser health check failed, resetting...",
+                f"[LEADERBOARD] Success over HTTP: found {len(items)} players",
                 file=sys.stderr,
             )
-            await reset_browser()
+            metrics.incr("scrapes", tier="http", outcome="success")
+            return {"items": items}
+        print("[LEADERBOARD] Escalating to browser...", file=sys.stderr)
+        metrics.incr("escalations")
 
-        context = await get_browser_context()
-        page_obj = await context.new_page()
+    result = await scrape_leaderboard_browser(url, page_num, priority)
+    outcome = "success" if result.get("items") else "failure"
+    metrics.incr("scrapes", tier="browser", outcome=outcome)
+    if HTTP_FIRST and result.get("items"):
+        await export_cookies_to_http()
+    return result
 
-        await page_obj.goto(url, wait_until="domcontentloaded", timeout=20000)
 
-        title = await page_obj.title()
-        if "Just a moment" in title or "Attention Required" in title:
+async def scrape_leaderboard_browser(
+    url: str, page_num: int, priority: int = INTERACTIVE
+):
+    tab = None
+    reusable = False
+
+    try:
+        with metrics.span("tab_acquire"):
+            tab = await acquire_tab()
+
+        with metrics.span("rate_wait"):
+            await scheduler.acquire_async(SITE_HOST, priority)
+        with metrics.span("goto"):
+            await load_leaderboard(tab, url)
+
+        title = await tab.title()
+        challenged = "Just a moment" in title or "Attention Required" in title
+        scheduler.record(SITE_HOST, blocked=challenged)
+        if challenged:
             print(
                 f"[LEADERBOARD] Cloudflare challenge detected, waiting...",
                 file=sys.stderr,
             )
-            await page_obj.wait_for_timeout(2000)
+            metrics.incr("challenges", tier="browser")
+            with metrics.span("challenge_wait"):
+                cleared = await wait_for_clearance(tab)
+            if cleared:
+                print("[LEADERBOARD] Challenge cleared", file=sys.stderr)
+                metrics.incr("challenge_outcomes", result="cleared")
+                await save_storage_state()
+            else:
+                print(
+                    f"[LEADERBOARD] Challenge not cleared within {CHALLENGE_TIMEOUT:g}s",
+                    file=sys.stderr,
+                )
+                metrics.incr("challenge_outcomes", result="timeout")
 
-        items = await parse_initial_state(page_obj)
+        items = await parse_initial_state(tab)
 
         if not items:
             print(f"[LEADERBOARD] Trying DOM fallback...", file=sys.stderr)
-            items = await parse_dom(page_obj, page_num)
+            items = await parse_dom(tab, page_num)
 
-        await page_obj.close()
+        reusable = True
 
         if items and len(items) > 0:
             print(f"[LEADERBOARD] Success: found {len(items)} players", file=sys.stderr)
@@ -284,10 +828,358 @@ async def get_leaderboard(region: str, page_num: int, act_id: str = ACT_ID):
 
     except Exception as e:
         print(f"[LEADERBOARD] Error: {e}", file=sys.stderr)
+        metrics.incr("errors", tier="browser")
         return {"error": "Service temporarily unavailable"}
 
     finally:
-        _pending_scrapes.discard(cache_key)
+        if tab is not None:
+            await release_tab(tab, reusable)
+
+
+async def get_leaderboard(
+    region: str, page_num: int, act_id: str = ACT_ID, priority: int = INTERACTIVE
+):
+    validated_region = validate_region(region)
+    validated_act_id = validate_act_id(act_id)
+
+    if not isinstance(page_num, int) or page_num < 1 or page_num > 10000:
+        return {"error": "Invalid page number"}
+
+    cache_key = f"{validated_region}:{validated_act_id}:{page_num}"
+
+    url = f"{LEADERBOARD_URL}?platform=pc&region={validated_region}&act={validated_act_id}&page={page_num}"
+
+    if _scrapes.in_flight(cache_key):
+        print(
+            f"[LEADERBOARD] Already scraping {cache_key}, waiting for it...",
+            file=sys.stderr,
+        )
+        metrics.incr("coalesced")
+
+    with metrics.span("scrape"):
+        return await _scrapes.do(
+            cache_key,
+            scrape_and_record,
+            url,
+            validated_region,
+            validated_act_id,
+            page_num,
+            priority,
+        )
+
+
+async def scrape_and_record(
+    url: str, region: str, act_id: str, page_num: int, priority: int
+):
+    """Scrape a page and append it to the snapshot history once per scrape."""
+    result = await scrape_leaderboard(url, region, page_num, priority)
+    if result.get("items"):
+        # SQLite and file writes stay off the event loop.
+        await asyncio.to_thread(record_snapshot, region, act_id, result["items"])
+    return result
+
+
+def get_store() -> LeaderboardStore:
+    global _store
+
+    if _store is None:
+        _store = LeaderboardStore()
+    return _store
+
+
+def read_store(store: LeaderboardStore, region: str, act_id: str, page_num: int):
+    """Note the request for refresh ordering, then return the page if fresh."""
+    store.record_request(region, act_id, page_num)
+    return store.get(region, act_id, page_num, CACHE_TTL)
+
+
+async def get_leaderboard_cached(
+    region: str, page_num: int, act_id: str = ACT_ID, priority: int = INTERACTIVE
+):
+    """Serve a page from the leaderboard store if fresh, scraping it otherwise."""
+    validated_region = validate_region(region)
+    validated_act_id = validate_act_id(act_id)
+
+    if not isinstance(page_num, int) or page_num < 1 or page_num > 10000:
+        return {"error": "Invalid page number"}
+
+    global _interactive_requests
+
+    store = get_store()
+    prefetched = False
+    if priority == INTERACTIVE:
+        prefetched = _prefetcher.record(validated_region, validated_act_id, page_num)
+
+    # SQLite reads and writes stay off the event loop.
+    items = await asyncio.to_thread(
+        read_store, store, validated_region, validated_act_id, page_num
+    )
+    if items:
+        print(
+            f"[LEADERBOARD] Store hit for page {page_num} in {validated_region}",
+            file=sys.stderr,
+        )
+        metrics.incr("cache", cache="store", result="hit")
+        if prefetched:
+            metrics.incr("prefetch", result="hit")
+        return {"items": items}
+
+    metrics.incr("cache", cache="store", result="miss")
+
+    if priority == INTERACTIVE:
+        _interactive_requests += 1
+    try:
+        result = await get_leaderboard(
+            validated_region, page_num, validated_act_id, priority
+        )
+    finally:
+        if priority == INTERACTIVE:
+            _interactive_requests -= 1
+    if result.get("items"):
+        await asyncio.to_thread(
+            store.save, validated_region, validated_act_id, page_num, result["items"]
+        )
+    return result
+
+
+async def get_leaderboard_pages(
+    region: str,
+    pages,
+    act_id: str = ACT_ID,
+    use_store: bool = False,
+    priority: int = INTERACTIVE,
+):
+    """Fetch many pages in parallel, yielding ``(page, result)`` as each finishes.
+
+    Parallelism is bounded by the tab pool, so at most ``TAB_POOL_SIZE`` pages
+    load at once in the shared browser context.
+    """
+    validate_region(region)
+    validate_act_id(act_id)
+    fetch_page = get_leaderboard_cached if use_store else get_leaderboard
+
+    async def fetch(page_num):
+        return page_num, await fetch_page(region, page_num, act_id, priority)
+
+    for next_result in asyncio.as_completed([fetch(p) for p in dict.fromkeys(pages)]):
+        yield await next_result
+
+
+def plan_jobs(jobs) -> list[tuple[str, str, int]]:
+    """Validate and dedupe batch jobs into ``(region, act_id, page)`` work items.
+
+    A job is ``{"region": ..., "act_id": ..., "page": n}`` or uses ``"pages"``
+    with a list or a spec such as ``"1-50"``; ``act_id`` defaults to
+    ``ACT_ID``. Pages run lowest first within each region/act pair, and the
+    pairs are interleaved round-robin so one region or act can't hold up the
+    rest.
+    """
+    groups: dict[tuple[str, str], dict[int, None]] = {}
+    for job in jobs:
+        if not isinstance(job, dict):
+            raise TypeError("job must be an object")
+
+        region = validate_region(job["region"])
+        act_id = validate_act_id(job.get("act_id") or ACT_ID)
+        pages = job["pages"] if "pages" in job else [job["page"]]
+        if isinstance(pages, str):
+            pages = parse_pages(pages)
+
+        group = groups.setdefault((region, act_id), {})
+        for page_num in pages:
+            if not isinstance(page_num, int) or page_num < 1 or page_num > 10000:
+                raise ValueError(f"Invalid page number: {page_num}")
+            group[page_num] = None
+
+    queues = [
+        [(region, act_id, page_num) for page_num in sorted(pages)]
+        for (region, act_id), pages in groups.items()
+    ]
+    return [
+        item
+        for round_items in itertools.zip_longest(*queues)
+        for item in round_items
+        if item is not None
+    ]
+
+
+async def get_leaderboard_batch(
+    jobs,
+    use_store: bool = False,
+    priority: int = INTERACTIVE,
+    concurrency: int = BATCH_CONCURRENCY,
+):
+    """Run a multi-region, multi-act job list, yielding ``(region, act_id, page, result)``.
+
+    Work items are planned by ``plan_jobs`` and started in that order by at
+    most ``concurrency`` workers, so a batch of thousands of pages never has
+    more than that many in flight. Each one takes the usual HTTP-then-browser
+    path and results stream out as they finish.
+    """
+    plan = plan_jobs(jobs)
+    fetch_page = get_leaderboard_cached if use_store else get_leaderboard
+    results: asyncio.Queue = asyncio.Queue()
+    pending = iter(plan)
+
+    async def worker():
+        for region, act_id, page_num in pending:
+            try:
+                result = await fetch_page(region, page_num, act_id, priority)
+            except Exception as e:
+                print(
+                    f"[LEADERBOARD] Batch error for {region}:{act_id}:{page_num}: {e}",
+                    file=sys.stderr,
+                )
+                result = {"error": "Service temporarily unavailable"}
+            await results.put((region, act_id, page_num, result))
+
+    workers = [
+        asyncio.create_task(worker())
+        for _ in range(min(max(1, concurrency), len(plan)))
+    ]
+    try:
+        for _ in plan:
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+async def refresh_leaderboards(
+    budget: int = REFRESH_BUDGET,
+    min_age: float = REFRESH_MIN_AGE,
+    region: Optional[str] = None,
+):
+    """Re-scrape stored pages in priority order, yielding one update per page.
+
+    Up to ``budget`` pages older than ``min_age`` seconds are refreshed, top
+    pages first and then the most recently requested ones. A page is only
+    rewritten in the store when its content hash changed.
+    """
+    store = get_store()
+    if _shard is None:
+        candidates = await asyncio.to_thread(
+            store.refresh_candidates, budget, min_age, REFRESH_TOP_PAGES, region
+        )
+    else:
+        # Every shard shares the store but only refreshes the pages it owns.
+        index, count = _shard
+        ring = HashRing(count)
+        shared = await asyncio.to_thread(
+            store.refresh_candidates, budget * count, min_age, REFRESH_TOP_PAGES, region
+        )
+        candidates = [
+            candidate
+            for candidate in shared
+            if ring.node_for(page_key(candidate[0], candidate[2])) == index
+        ][:budget]
+
+    refreshes = [refresh_page(store, *candidate) for candidate in candidates]
+    for next_update in asyncio.as_completed(refreshes):
+        yield await next_update
+
+
+async def refresh_page(
+    store: LeaderboardStore, region: str, act_id: str, page_num: int
+):
+    """Re-scrape one page at background priority and save it to the store."""
+    result = await get_leaderboard(region, page_num, act_id, BACKGROUND)
+    update = {"region": region, "act_id": act_id, "page": page_num}
+    if result.get("items"):
+        update["changed"] = await asyncio.to_thread(
+            store.save, region, act_id, page_num, result["items"]
+        )
+    else:
+        update["error"] = result.get("error", "Service temporarily unavailable")
+    return update
+
+
+def announce_change(update: dict):
+    """Tell the serve client a stored page changed, so it can drop its copy."""
+    write_response(
+        {
+            "event": "changed",
+            "region": update["region"],
+            "act_id": update["act_id"],
+            "page": update["page"],
+        }
+    )
+
+
+async def refresh_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            changed = 0
+            async for update in refresh_leaderboards():
+                if update.get("changed"):
+                    changed += 1
+                    announce_change(update)
+            print(
+                f"[LEADERBOARD] Refresh complete, {changed} pages changed",
+                file=sys.stderr,
+            )
+        except Exception as e:
+            print(f"[LEADERBOARD] Refresh failed: {e}", file=sys.stderr)
+
+
+async def prefetch_leaderboards(budget: int = PREFETCH_BUDGET):
+    """Warm the pages the access pattern says will be asked for next.
+
+    Stops early as soon as a user request arrives, so prefetching only ever
+    uses capacity that would otherwise sit idle.
+    """
+    store = get_store()
+    deadline = CACHE_TTL - PREFETCH_LEAD
+
+    def needs_fetch(key):
+        return time.time() - store.fetched_at(*key) > deadline
+
+    owns = None
+    if _shard is not None:
+        index, count = _shard
+        ring = HashRing(count)
+        owns = lambda key: ring.node_for(page_key(key[0], key[2])) == index
+
+    warmed = 0
+    for key in _prefetcher.plan(budget, needs_fetch, owns):
+        if _interactive_requests > 0:
+            break
+        update = await refresh_page(store, *key)
+        if "error" in update:
+            metrics.incr("prefetch", result="error")
+            _prefetcher.mark_failed(key)
+            continue
+        if update.get("changed"):
+            announce_change(update)
+        _prefetcher.mark_warmed(key)
+        metrics.incr("prefetch", result="warmed")
+        warmed += 1
+    return warmed
+
+
+async def prefetch_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        if _interactive_requests > 0:
+            continue
+        try:
+            warmed = await prefetch_leaderboards()
+            if warmed:
+                print(f"[LEADERBOARD] Prefetched {warmed} pages", file=sys.stderr)
+        except Exception as e:
+            print(f"[LEADERBOARD] Prefetch failed: {e}", file=sys.stderr)
+
+
+async def print_refresh(budget: int, min_age: float, region: Optional[str]):
+    async for update in refresh_leaderboards(budget, min_age, region):
+        write_response(update)
+    await shutdown()
+
+
+async def shutdown():
+    await close_http_session()
+    await reset_browser()
 
 
 async def warmup():
@@ -296,7 +1188,7 @@ async def warmup():
     try:
         await get_browser_context()
 
-        if await check_browser_health():
+        if await probe_browser():
             print("[LEADERBOARD] Browser warmed up and ready", file=sys.stderr)
         else:
             print(
@@ -306,7 +1198,7 @@ async def warmup():
             await reset_browser()
             await get_browser_context()
 
-            if await check_browser_health():
+            if await probe_browser():
                 print(
                     "[LEADERBOARD] Browser warmed up and ready after reset",
                     file=sys.stderr,
@@ -320,24 +1212,415 @@ async def warmup():
         print(f"[LEADERBOARD] Warmup failed: {e}", file=sys.stderr)
 
 
-if __name__ == "__main__":
+async def handle_request(request: dict):
+    try:
+        region = request["region"]
+        page_num = request["page"]
+        act_id = request.get("act_id") or ACT_ID
+        return await get_leaderboard_cached(region, page_num, act_id)
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"[LEADERBOARD] Invalid request: {e}", file=sys.stderr)
+        return {"error": "Invalid request"}
+
+
+async def handle_pages_request(request_id, request: dict):
+    try:
+        pages = request["pages"]
+        if not isinstance(pages, list):
+            raise TypeError("pages must be a list")
+
+        async for page_num, result in get_leaderboard_pages(
+            request["region"], pages, request.get("act_id") or ACT_ID, use_store=True
+        ):
+            write_response({"id": request_id, "page": page_num, "result": result})
+        write_response({"id": request_id, "done": True})
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"[LEADERBOARD] Invalid request: {e}", file=sys.stderr)
+        write_response(
+            {"id": request_id, "result": {"error": "Invalid request"}, "done": True}
+        )
+
+
+def write_response(response: dict):
+    sys.stdout.write(json.dumps(response) + "\n")
+    sys.stdout.flush()
+
+
+async def handle_batch_request(request_id, request: dict):
+    try:
+        jobs = request["jobs"]
+        if not isinstance(jobs, list):
+            raise TypeError("jobs must be a list")
+
+        async for region, act_id, page_num, result in get_leaderboard_batch(
+            jobs, use_store=True, priority=BACKGROUND
+        ):
+            write_response(
+                {
+                    "id": request_id,
+                    "region": region,
+                    "act_id": act_id,
+                    "page": page_num,
+                    "result": result,
+                }
+            )
+        write_response({"id": request_id, "done": True})
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"[LEADERBOARD] Invalid request: {e}", file=sys.stderr)
+        write_response(
+            {"id": request_id, "result": {"error": "Invalid request"}, "done": True}
+        )
+
+
+async def serve_request(request_id, request: dict):
+    if request.get("op") == "metrics":
+        result = metrics.render(request.get("format"))
+        write_response({"id": request_id, "result": result, "done": True})
+        return
+
+    if request.get("op") == "seen":
+        # A prefetch hint from the shard supervisor; never answered.
+        try:
+            _prefetcher.observe(
+                validate_region(request["region"]),
+                validate_act_id(request.get("act_id") or ACT_ID),
+                int(request["page"]),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"[LEADERBOARD] Invalid prefetch hint: {e}", file=sys.stderr)
+        return
+
+    if "jobs" in request:
+        await handle_batch_request(request_id, request)
+        return
+
+    if "pages" in request:
+        await handle_pages_request(request_id, request)
+        return
+
+    result = await handle_request(request)
+    write_response({"id": request_id, "result": result, "done": True})
+
+
+def parse_pages(spec: str) -> list[int]:
+    """Parse a page list such as ``1-50`` or ``1,3,7-9``."""
+    pages = []
+    for part in spec.split(","):
+        start, _, end = part.strip().partition("-")
+        first = int(start)
+        last = int(end) if end else first
+        if first < 1 or last > 10000 or first > last:
+            raise ValueError(f"Invalid page range: {part}")
+        pages.extend(range(first, last + 1))
+    return pages
+
+
+async def print_leaderboard_page(
+    region: str, page_num: int, act_id: str, fmt: str = "json"
+):
+    writer = open_writer(fmt, single=True)
+    result = await get_leaderboard(region, page_num, act_id)
+    await shutdown()
+    writer.write(
+        {
+            "region": validate_region(region),
+            "act_id": act_id,
+            "page": page_num,
+            "result": result,
+        }
+    )
+    writer.close()
+
+
+async def print_leaderboard_pages(
+    region: str, pages: list[int], act_id: str, fmt: str = "ndjson"
+):
+    writer = open_writer(fmt)
+    try:
+        async for page_num, result in get_leaderboard_pages(region, pages, act_id):
+            writer.write({"page": page_num, "result": result})
+    finally:
+        writer.close()
+        await shutdown()
+
+
+async def print_leaderboard_batch(
+    jobs: list[dict], use_store: bool, concurrency: int, fmt: str = "ndjson"
+):
+    writer = open_writer(fmt)
+    try:
+        async for region, act_id, page_num, result in get_leaderboard_batch(
+            jobs, use_store=use_store, concurrency=concurrency
+        ):
+            writer.write(
+                {"region": region, "act_id": act_id, "page": page_num, "result": result}
+            )
+    finally:
+        writer.close()
+        await shutdown()
+
+
+def read_jobs(path: str) -> list[dict]:
+    """Read newline-delimited JSON jobs from a file, or stdin for ``-``."""
+    source = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        return [json.loads(line) for line in source if line.strip()]
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+def batch_jobs(args) -> list[dict]:
+    if args.jobs:
+        return read_jobs(args.jobs)
+
+    regions = (
+        ALLOWED_REGIONS
+        if args.regions == "all"
+        else [r for r in args.regions.split(",") if r.strip()]
+    )
+    acts = [a.strip() for a in args.acts.split(",") if a.strip()]
+    return [
+        {"region": region, "act_id": act_id, "pages": args.pages}
+        for region in regions
+        for act_id in acts
+    ]
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse a shard identity such as ``2/8``."""
+    index, _, count = spec.partition("/")
+    shard = (int(index), int(count))
+    if not 0 <= shard[0] < shard[1]:
+        raise ValueError(f"Invalid shard: {spec}")
+    return shard
+
+
+async def serve(shard: Optional[tuple[int, int]] = None):
+    """Answer newline-delimited JSON requests on stdin with one shared browser.
+
+    Each request line looks like ``{"id": 1, "region": "na", "page": 3}`` and is
+    answered on stdout with ``{"id": 1, "result": {...}, "done": true}``.
+    A request with ``"pages": [1, 2, ...]`` instead of ``"page"`` is answered
+    with one ``{"id": 1, "page": n, "result": {...}}`` line per page followed by
+    ``{"id": 1, "done": true}``. Requests are handled concurrently and answered
+    in completion order.
+
+    ``{"id": 1, "jobs": [{"region": "eu", "act_id": ..., "pages": "1-5"}, ...]}``
+    runs a batch across regions and acts at background priority, answering
+    with one ``{"id": 1, "region": ..., "act_id": ..., "page": n, "result": {...}}``
+    line per page and then ``{"id": 1, "done": true}``.
+
+    Pages are served from the leaderboard store while fresh. Every
+    ``REFRESH_INTERVAL`` seconds stored pages are refreshed in the background,
+    and each page whose contents changed is announced with an unsolicited
+    ``{"event": "changed", "region": ..., "act_id": ..., "page": n}`` line.
+    Every ``PREFETCH_INTERVAL`` seconds, if no user request is in flight, up
+    to ``PREFETCH_BUDGET`` pages are warmed ahead of demand: neighbours of
+    recently requested pages and the most requested pages. Pages that fail to
+    prefetch are skipped for a cooldown that grows with each failure.
+
+    ``{"op": "seen", "region": ..., "act_id": ..., "page": n}`` marks a page
+    as recently requested without fetching it or answering, so its
+    neighbours get prefetched; the shard supervisor sends it to the shards
+    that own a requested page's neighbours.
+
+    ``{"id": 2, "op": "metrics"}`` returns counters and per-phase timings as
+    JSON; add ``"format": "prometheus"`` for ``{"text": ...}`` in Prometheus
+    exposition format.
+
+    ``shard`` is set when running under ``shard_supervisor``; it labels the
+    metrics, limits background refreshes to the pages this shard owns and
+    scales the outbound rate budget down to this shard's share.
+    """
+    global _shard
+
+    _shard = shard
+    if shard is None:
+        metrics.set_labels(scraper="leaderboard")
+    else:
+        metrics.set_labels(scraper="leaderboard", shard=shard[0])
+        # The per-host rate budget is global, so each shard gets its share.
+        scheduler.split(shard[1])
+    await warmup()
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=1024 * 1024)
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+    )
+
+    print("[LEADERBOARD] Serving requests on stdin", file=sys.stderr)
+
+    tasks = set()
+    refresher = None
+    if REFRESH_INTERVAL > 0:
+        refresher = asyncio.create_task(refresh_periodically(REFRESH_INTERVAL))
+    prefetcher = None
+    if PREFETCH_INTERVAL > 0 and PREFETCH_BUDGET > 0:
+        prefetcher = asyncio.create_task(prefetch_periodically(PREFETCH_INTERVAL))
+    monitor = None
+    if BROWSER_PROBE_INTERVAL > 0:
+        monitor = asyncio.create_task(monitor_browser(BROWSER_PROBE_INTERVAL))
+
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be an object")
+            except ValueError as e:
+                print(f"[LEADERBOARD] Malformed request: {e}", file=sys.stderr)
+                write_response(
+                    {"id": None, "result": {"error": "Invalid request"}, "done": True}
+                )
+                continue
+
+            task = asyncio.create_task(serve_request(request.get("id"), request))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        if refresher is not None:
+            refresher.cancel()
+        if prefetcher is not None:
+            prefetcher.cancel()
+        if monitor is not None:
+            monitor.cancel()
+        await shutdown()
+
+
+def main(argv: Optional[list[str]] = None):
     parser = argparse.ArgumentParser(
         description="Valorant leaderboard scraper with Playwright"
     )
-    parser.add_argument("region", type=str, help="Server region")
-    parser.add_argument("page", type=int, help="Page number")
-    parser.add_argument(
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    page_parser = subparsers.add_parser("page", help="Get one leaderboard page")
+    page_parser.add_argument("region", type=str, help="Server region")
+    page_parser.add_argument("page", type=int, help="Page number")
+    page_parser.add_argument(
+        "act_id", type=str, nargs="?", default=ACT_ID, help="Valorant Act ID"
+    )
+    add_format_argument(page_parser, "json")
+
+    pages_parser = subparsers.add_parser(
+        "pages", help="Get many leaderboard pages in parallel"
+    )
+    pages_parser.add_argument("region", type=str, help="Server region")
+    pages_parser.add_argument(
+        "pages", type=parse_pages, help="Page list, e.g. 1-50 or 1,3,7-9"
+    )
+    pages_parser.add_argument(
         "act_id", type=str, nargs="?", default=ACT_ID, help="Valorant Act ID"
     )
+    add_format_argument(pages_parser, "ndjson")
 
-    args = parser.parse_args()
+    batch_parser = subparsers.add_parser(
+        "batch", help="Fetch pages across regions and acts, streaming results"
+    )
+    batch_parser.add_argument(
+        "--regions",
+        type=str,
+        default="all",
+        help="Comma-separated regions, or 'all' (default)",
+    )
+    batch_parser.add_argument(
+        "--acts", type=str, default=ACT_ID, help="Comma-separated Valorant Act IDs"
+    )
+    batch_parser.add_argument(
+        "--pages", type=str, default="1", help="Page list, e.g. 1-50 or 1,3,7-9"
+    )
+    batch_parser.add_argument(
+        "--jobs",
+        type=str,
+        help="NDJSON job file ('-' for stdin) instead of --regions/--acts/--pages",
+    )
+    batch_parser.add_argument(
+        "--store", action="store_true", help="Serve fresh pages from the store"
+    )
+    batch_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BATCH_CONCURRENCY,
+        help="Maximum pages in flight",
+    )
+    add_format_argument(batch_parser, "ndjson")
+
+    refresh_parser = subparsers.add_parser(
+        "refresh", help="Re-scrape stored pages and report which ones changed"
+    )
+    refresh_parser.add_argument(
+        "--budget", type=int, default=REFRESH_BUDGET, help="Maximum pages to fetch"
+    )
+    refresh_parser.add_argument(
+        "--min-age",
+        type=float,
+        default=REFRESH_MIN_AGE,
+        help="Only refresh pages fetched at least this many seconds ago",
+    )
+    refresh_parser.add_argument("--region", type=str, help="Only refresh this region")
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Serve newline-delimited JSON requests on stdin/stdout"
+    )
+    serve_parser.add_argument(
+        "--shards",
+        type=int,
+        default=LEADERBOARD_SHARDS,
+        help="Worker processes, each with its own browser (0 sizes to cores and memory)",
+    )
+    serve_parser.add_argument("--shard", type=parse_shard, help=argparse.SUPPRESS)
+
+    args = parser.parse_args(argv)
 
     try:
-        result = asyncio.run(get_leaderboard(args.region, args.page, args.act_id))
-        print(json.dumps(result))
+        if args.command == "page":
+            asyncio.run(
+                print_leaderboard_page(args.region, args.page, args.act_id, args.format)
+            )
+
+        elif args.command == "pages":
+            asyncio.run(
+                print_leaderboard_pages(
+                    args.region, args.pages, args.act_id, args.format
+                )
+            )
+
+        elif args.command == "batch":
+            jobs = batch_jobs(args)
+            asyncio.run(
+                print_leaderboard_batch(jobs, args.store, args.concurrency, args.format)
+            )
+
+        elif args.command == "refresh":
+            region = validate_region(args.region) if args.region else None
+            asyncio.run(print_refresh(max(0, args.budget), args.min_age, region))
+
+        elif args.command == "serve":
+            if args.shard is None and args.shards != 1:
+                from shard_supervisor import default_shard_count, supervise
+
+                shards = args.shards if args.shards > 0 else default_shard_count()
+                asyncio.run(supervise(shards))
+            else:
+                asyncio.run(serve(args.shard))
+
     except ValueError as e:
         print(f"[LEADERBOARD] Validation error: {str(e)}", file=sys.stderr)
         sys.exit(1)
     except Exception as e:
         print(f"[LEADERBOARD] Internal error: {str(e)}", file=sys.stderr)
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
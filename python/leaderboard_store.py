@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+STORE_PATH = os.environ.get("LEADERBOARD_STORE_PATH", "data/leaderboard.sqlite3")
+
+
+def content_hash(items: list[dict]) -> str:
+    payload = json.dumps(items, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class LeaderboardStore:
+    """SQLite store of scraped leaderboard pages keyed by ``region:act:page``.
+
+    Every page keeps a content hash so a refresh can tell whether it actually
+    changed, plus the time it was last requested so refreshes can favour the
+    pages people are looking at. Safe to use from worker threads.
+    """
+
+    def __init__(self, path: str = STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                region TEXT NOT NULL,
+                act_id TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                hash TEXT,
+                items TEXT,
+                fetched_at REAL NOT NULL DEFAULT 0,
+                changed_at REAL NOT NULL DEFAULT 0,
+                requested_at REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (region, act_id, page)
+            )
+            """)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def get(self, region: str, act_id: str, page: int, max_age: float):
+        """Return the stored items for a page if fetched within ``max_age`` seconds."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT items, fetched_at FROM pages WHERE region = ? AND act_id = ? AND page = ?",
+                (region, act_id, page),
+            ).fetchone()
+
+        if row is None or row[0] is None or time.time() - row[1] > max_age:
+            return None
+        return json.loads(row[0])
+
+    def fetched_at(self, region: str, act_id: str, page: int) -> float:
+        """When a page was last scraped, or 0 if it never has been."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fetched_at FROM pages WHERE region = ? AND act_id = ? AND page = ? AND items IS NOT NULL",
+                (region, act_id, page),
+            ).fetchone()
+        return row[0] if row else 0.0
+
+    def record_request(self, region: str, act_id: str, page: int):
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT INTO pages (region, act_id, page, requested_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (region, act_id, page) DO UPDATE SET requested_at = excluded.requested_at
+                """,
+                (region, act_id, page, time.time()),
+            )
+
+    def save(self, region: str, act_id: str, page: int, items: list[dict]) -> bool:
+        """Store a freshly scraped page. Returns True if its contents changed."""
+        digest = content_hash(items)
+        now = time.time()
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hash FROM pages WHERE region = ? AND act_id = ? AND page = ?",
+                (region, act_id, page),
+            ).fetchone()
+
+            if row is not None and row[0] == digest:
+                self._db.execute(
+                    "UPDATE pages SET fetched_at = ? WHERE region = ? AND act_id = ? AND page = ?",
+                    (now, region, act_id, page),
+                )
+                return False
+
+            self._db.execute(
+                """
+                INSERT INTO pages (region, act_id, page, hash, items, fetched_at, changed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (region, act_id, page) DO UPDATE SET
+                    hash = excluded.hash,
+                    items = excluded.items,
+                    fetched_at = excluded.fetched_at,
+                    changed_at = excluded.changed_at
+                """,
+                (region, act_id, page, digest, json.dumps(items), now, now),
+            )
+            return True
+
+    def refresh_candidates(
+        self, limit: int, min_age: float, top_pages: int, region: Optional[str] = None
+    ) -> list[tuple[str, str, int]]:
+        """Pages due for a refresh, top pages first, then most recently requested.
+
+        Only pages that have been scraped successfully before are refreshed;
+        requests for pages that never loaded (out of range, failing) leave a
+        row behind but are not retried from here.
+        """
+        query = """
+            SELECT region, act_id, page FROM pages
+            WHERE items IS NOT NULL AND fetched_at < ? AND (? IS NULL OR region = ?)
+            ORDER BY page <= ? DESC, requested_at DESC, page ASC
+            LIMIT ?
+        """
+        with self._lock:
+            rows = self._db.execute(
+                query, (time.time() - min_age, region, region, top_pages, limit)
+            ).fetchall()
+        return [(row[0], row[1], row[2]) for row in rows]
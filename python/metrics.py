@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+from typing import Optional
+
+METRICS_PREFIX = "getrank_scraper"
+# Optional file that receives one JSON line per finished span.
+METRICS_SPAN_LOG = os.environ.get("SCRAPER_METRICS_SPAN_LOG", "")
+SPAN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def format_labels(key: tuple, extra: Optional[tuple] = None) -> str:
+    pairs = key + (extra or ())
+    if not pairs:
+        return ""
+    escaped = (
+        name
+        + '="'
+        + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(SPAN_BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(SPAN_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Metrics:
+    """Process-wide counters and phase timings for a scraper process.
+
+    ``span`` times a phase of a fetch (``page.goto``, a profile attempt, ...)
+    into a histogram labelled by phase; ``incr`` bumps a named counter. Both
+    can be read back as Prometheus text or as a JSON snapshot.
+    """
+
+    def __init__(self, span_log: str = METRICS_SPAN_LOG):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._spans: dict[tuple, Histogram] = {}
+        self._labels: tuple = ()
+        self._span_log = open(span_log, "a", buffering=1) if span_log else None
+
+    def set_labels(self, **labels):
+        """Labels added to every exported series, e.g. ``scraper="stats"``."""
+        self._labels = label_key(labels)
+
+    def incr(self, name: str, value: float = 1, **labels):
+        key = (name, label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, phase: str, seconds: float, **labels):
+        key = label_key({"phase": phase, **labels})
+        with self._lock:
+            histogram = self._spans.get(key)
+            if histogram is None:
+                histogram = self._spans[key] = Histogram()
+            histogram.observe(seconds)
+
+        if self._span_log is not None:
+            line = {"span": phase, "ms": round(seconds * 1000, 3), **labels}
+            try:
+                self._span_log.write(json.dumps(line) + "\n")
+            except (OSError, ValueError) as e:
+                print(f"[METRICS] Span log write failed: {e}", file=sys.stderr)
+
+    @contextlib.contextmanager
+    def span(self, phase: str, **labels):
+        """Time the enclosed block as one ``phase``, whether or not it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started, **labels)
+
+    def prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            spans = sorted(self._spans.items())
+
+        seen = set()
+        for (name, key), value in counters:
+            metric = f"{METRICS_PREFIX}_{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{format_labels(self._labels + key)} {value:g}")
+
+        if spans:
+            metric = f"{METRICS_PREFIX}_phase_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for key, histogram in spans:
+                labels = self._labels + key
+                cumulative = 0
+                for bound, count in zip(SPAN_BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f"{metric}_bucket{format_labels(labels, (('le', f'{bound:g}'),))} {cumulative}"
+                    )
+                lines.append(
+                    f"{metric}_bucket{format_labels(labels, (('le', '+Inf'),))} {histogram.total}"
+                )
+                lines.append(f"{metric}_sum{format_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{metric}_count{format_labels(labels)} {histogram.total}")
+
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = [
+                {"name": name, **dict(self._labels + key), "value": value}
+                for (name, key), value in sorted(self._counters.items())
+            ]
+            spans = [
+                {
+                    **dict(self._labels + key),
+                    "count": histogram.total,
+                    "avg_ms": round(1000 * histogram.sum / histogram.total, 3),
+                    "total_ms": round(1000 * histogram.sum, 3),
+                }
+                for key, histogram in sorted(self._spans.items())
+            ]
+        return {"counters": counters, "spans": spans}
+
+    def render(self, fmt: Optional[str]):
+        """The payload for a serve-mode ``{"op": "metrics"}`` request."""
+        if fmt == "prometheus":
+            return {"text": self.prometheus()}
+        return self.snapshot()
+
+
+metrics = Metrics()
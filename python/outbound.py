@@ -0,0 +1,173 @@
+import os
+import time
+import asyncio
+import threading
+import urllib.parse
+from typing import Optional
+
+API_HOST = "api.tracker.gg"
+SITE_HOST = "tracker.gg"
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+BLOCK_STATUSES = (403, 429, 503)
+
+HOST_RATES = {
+    API_HOST: float(os.environ.get("OUTBOUND_API_RATE", "5")),
+    SITE_HOST: float(os.environ.get("OUTBOUND_SITE_RATE", "2")),
+}
+DEFAULT_RATE = float(os.environ.get("OUTBOUND_DEFAULT_RATE", "2"))
+# Fraction of each bucket kept back for interactive requests.
+BACKGROUND_RESERVE = float(os.environ.get("OUTBOUND_BACKGROUND_RESERVE", "0.5"))
+MIN_RATE_FRACTION = 0.1
+RECOVERY_FRACTION = 0.05
+
+
+class HostBudget:
+    """Token bucket for one host whose rate adapts to observed blocking.
+
+    Blocked responses halve the rate (down to a floor); every clean response
+    adds back a small fraction of the configured rate.
+    """
+
+    def __init__(self, rate: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.interactive_waiting = 0
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def record(self, blocked: bool):
+        if blocked:
+            self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+        else:
+            self.rate = min(
+                self.max_rate, self.rate + self.max_rate * RECOVERY_FRACTION
+            )
+
+
+class OutboundScheduler:
+    """Shared per-host rate limiter with interactive and background priorities.
+
+    Interactive requests may drain a host's bucket completely. Background
+    requests leave ``BACKGROUND_RESERVE`` of the bucket untouched and wait
+    entirely while any interactive request is queued for the same host.
+    Usable from threads (``acquire``) and from asyncio (``acquire_async``).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._budgets: dict[str, HostBudget] = {}
+        self._share = 1.0
+
+    def _budget(self, host: str) -> HostBudget:
+        budget = self._budgets.get(host)
+        if budget is None:
+            budget = self._budgets[host] = HostBudget(
+                HOST_RATES.get(host, DEFAULT_RATE) * self._share
+            )
+        return budget
+
+    def configure(self, host: str, rate: float):
+        with self._lock:
+            self._budgets[host] = HostBudget(rate)
+
+    def split(self, count: int):
+        """Keep only a ``1/count`` share of every host's rate.
+
+        For one of ``count`` processes that together must stay within the
+        configured per-host budget.
+        """
+        with self._lock:
+            self._share = 1.0 / max(1, count)
+            for host, budget in self._budgets.items():
+                self._budgets[host] = HostBudget(budget.max_rate * self._share)
+
+    def _try_acquire(self, host: str, priority: int) -> float:
+        """Take a token and return 0, or return how long to wait before retrying."""
+        with self._lock:
+            budget = self._budget(host)
+            if budget.max_rate <= 0:
+                return 0.0
+
+            budget.refill(time.monotonic())
+
+            needed = 1.0
+            if priority != INTERACTIVE:
+                if budget.interactive_waiting:
+                    return 1.0 / budget.rate
+                needed += (budget.burst - 1.0) * BACKGROUND_RESERVE
+
+            if budget.tokens >= needed:
+                budget.tokens -= 1.0
+                return 0.0
+            return (needed - budget.tokens) / budget.rate
+
+    def _waiting(self, host: str, priority: int, delta: int):
+        if priority == INTERACTIVE:
+            with self._lock:
+                self._budget(host).interactive_waiting += delta
+
+    def acquire(self, host: str, priority: int = INTERACTIVE):
+        self._waiting(host, priority, 1)
+        try:
+            while True:
+                wait = self._try_acquire(host, priority)
+                if wait <= 0:
+                    return
+                time.sleep(wait)
+        finally:
+            self._waiting(host, priority, -1)
+
+    async def acquire_async(self, host: str, priority: int = INTERACTIVE):
+        self._waiting(host, priority, 1)
+        try:
+            while True:
+                wait = self._try_acquire(host, priority)
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+        finally:
+            self._waiting(host, priority, -1)
+
+    def record(self, host: str, blocked: bool):
+        with self._lock:
+            self._budget(host).record(blocked)
+
+    def record_status(self, host: str, status_code: int):
+        self.record(host, status_code in BLOCK_STATUSES)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                host: {
+                    "rate": round(budget.rate, 3),
+                    "max_rate": budget.max_rate,
+                    "tokens": round(budget.tokens, 3),
+                }
+                for host, budget in self._budgets.items()
+            }
+
+
+scheduler = OutboundScheduler()
+
+
+def curl_requests():
+    """curl_cffi's requests module, imported on first use.
+
+    Loading curl_cffi costs a few hundred milliseconds, which validation
+    failures and cache hits never need to pay.
+    """
+    from curl_cffi import requests
+
+    return requests
+
+
+def host_of(url: str) -> Optional[str]:
+    return urllib.parse.urlsplit(url).hostname
@@ -0,0 +1,206 @@
+import sys
+import json
+import struct
+from typing import BinaryIO, Iterator, Optional
+
+FORMATS = ("json", "ndjson", "msgpack", "packed")
+
+# Packed stream layout (little-endian):
+#   header  PACKED_MAGIC, u8 version
+#   frame   u32 body length, u8 kind, body
+#   kind 1  leaderboard page: u16 page, u8 + region, u8 + act id, u16 count,
+#           then count x (u32 rank, u8 + UTF-8 Riot ID)
+#   kind 0  any other record as UTF-8 JSON
+# where "u8 +" is a one-byte length followed by that many bytes.
+PACKED_MAGIC = b"GRPK"
+PACKED_VERSION = 1
+FRAME = struct.Struct("<IB")
+PAGE_HEADER = struct.Struct("<H")
+COUNT = struct.Struct("<H")
+RANK = struct.Struct("<I")
+KIND_JSON = 0
+KIND_PAGE = 1
+
+
+class JsonWriter:
+    """Collects every record and prints one JSON document on close.
+
+    Single-result commands print the bare ``result``; everything else prints
+    a list of records.
+    """
+
+    def __init__(self, stream, single: bool):
+        self.stream = stream
+        self.single = single
+        self.records = []
+
+    def write(self, record: dict):
+        self.records.append(record)
+
+    def close(self):
+        if self.single:
+            record = self.records[0] if self.records else {}
+            document = record.get("result", record)
+        else:
+            document = self.records
+        self.stream.write(json.dumps(document) + "\n")
+        self.stream.flush()
+
+
+class NdjsonWriter:
+    """One JSON line per record, flushed as soon as it is written."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record: dict):
+        self.stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+class MsgpackWriter:
+    """A stream of concatenated msgpack maps, one per record."""
+
+    def __init__(self, stream: BinaryIO):
+        try:
+            import msgpack
+        except ImportError:
+            raise ValueError("msgpack output needs the msgpack package installed")
+
+        self.stream = stream
+        self.packer = msgpack.Packer()
+
+    def write(self, record: dict):
+        self.stream.write(self.packer.pack(record))
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+def short_bytes(value) -> Optional[bytes]:
+    data = str(value or "").encode("utf-8")
+    return data if len(data) <= 255 else None
+
+
+def pack_page(record: dict) -> Optional[bytes]:
+    """Kind 1 body for a leaderboard page record, or None if it doesn't fit."""
+    result = record.get("result")
+    page = record.get("page")
+    if not isinstance(result, dict) or not isinstance(page, int):
+        return None
+    items = result.get("items")
+    if not isinstance(items, list) or len(items) > 0xFFFF or not 0 < page <= 0xFFFF:
+        return None
+
+    region = short_bytes(record.get("region"))
+    act_id = short_bytes(record.get("act_id"))
+    if region is None or act_id is None:
+        return None
+
+    body = bytearray(PAGE_HEADER.pack(page))
+    body += bytes([len(region)]) + region + bytes([len(act_id)]) + act_id
+    body += COUNT.pack(len(items))
+    for item in items:
+        rank = item.get("rank")
+        riot_id = short_bytes(item.get("riotId"))
+        if not isinstance(rank, int) or not 0 <= rank <= 0xFFFFFFFF or riot_id is None:
+            return None
+        body += RANK.pack(rank) + bytes([len(riot_id)]) + riot_id
+    return bytes(body)
+
+
+class PackedWriter:
+    """Length-prefixed frames, with leaderboard pages as packed rank/Riot ID rows."""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.stream.write(PACKED_MAGIC + bytes([PACKED_VERSION]))
+
+    def write(self, record: dict):
+        body = pack_page(record)
+        kind = KIND_PAGE
+        if body is None:
+            body = json.dumps(record, separators=(",", ":")).encode("utf-8")
+            kind = KIND_JSON
+        self.stream.write(FRAME.pack(len(body), kind) + body)
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+def open_writer(fmt: str, single: bool = False):
+    """Writer for ``fmt`` on stdout. ``single`` marks a one-result command."""
+    if fmt == "json":
+        return JsonWriter(sys.stdout, single)
+    if fmt == "ndjson":
+        return NdjsonWriter(sys.stdout)
+    if fmt == "msgpack":
+        return MsgpackWriter(sys.stdout.buffer)
+    if fmt == "packed":
+        return PackedWriter(sys.stdout.buffer)
+    raise ValueError(f"Unknown output format: {fmt}")
+
+
+def add_format_argument(subparser, default: str):
+    subparser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default=default,
+        help=f"Output format (default {default}); msgpack needs the msgpack package",
+    )
+
+
+def read_exactly(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated packed stream")
+    return data
+
+
+def read_short(body: bytes, at: int) -> tuple[str, int]:
+    length = body[at]
+    return body[at + 1 : at + 1 + length].decode("utf-8"), at + 1 + length
+
+
+def unpack_page(body: bytes) -> dict:
+    (page,) = PAGE_HEADER.unpack_from(body, 0)
+    region, at = read_short(body, PAGE_HEADER.size)
+    act_id, at = read_short(body, at)
+    (count,) = COUNT.unpack_from(body, at)
+    at += COUNT.size
+
+    items = []
+    for _ in range(count):
+        (rank,) = RANK.unpack_from(body, at)
+        riot_id, at = read_short(body, at + RANK.size)
+        items.append({"rank": rank, "riotId": riot_id})
+
+    record = {"page": page, "result": {"items": items}}
+    if region:
+        record["region"] = region
+    if act_id:
+        record["act_id"] = act_id
+    return record
+
+
+def read_packed(stream: BinaryIO) -> Iterator[dict]:
+    """Decode a packed stream back into records as each frame arrives."""
+    header = read_exactly(stream, len(PACKED_MAGIC) + 1)
+    if header[:-1] != PACKED_MAGIC or header[-1] != PACKED_VERSION:
+        raise ValueError("Not a packed result stream")
+
+    while True:
+        prefix = stream.read(FRAME.size)
+        if not prefix:
+            return
+        if len(prefix) != FRAME.size:
+            raise ValueError("Truncated packed stream")
+
+        length, kind = FRAME.unpack(prefix)
+        body = read_exactly(stream, length)
+        yield unpack_page(body) if kind == KIND_PAGE else json.loads(body)
@@ -0,0 +1,172 @@
+import os
+import time
+from collections import deque
+from typing import Callable, Optional
+
+PREFETCH_HALF_LIFE = float(os.environ.get("LEADERBOARD_PREFETCH_HALF_LIFE", "3600"))
+PREFETCH_NEIGHBOURS = int(os.environ.get("LEADERBOARD_PREFETCH_NEIGHBOURS", "1"))
+PREFETCH_RECENT = int(os.environ.get("LEADERBOARD_PREFETCH_RECENT", "32"))
+# A page that failed to prefetch is skipped for this long, doubling on every
+# further failure up to PREFETCH_FAILURE_COOLDOWN_MAX.
+PREFETCH_FAILURE_COOLDOWN = float(
+    os.environ.get("LEADERBOARD_PREFETCH_FAILURE_COOLDOWN", "600")
+)
+PREFETCH_FAILURE_COOLDOWN_MAX = 6 * 3600.0
+PREFETCH_MAX_TRACKED = 5000
+MAX_PAGE = 10000
+
+PageKey = tuple[str, str, int]
+
+
+def neighbours(key: PageKey, distance: int):
+    """Pages within ``distance`` of ``key``, nearest first."""
+    region, act_id, page = key
+    for step in range(1, distance + 1):
+        for candidate in (page + step, page - step):
+            if 1 <= candidate <= MAX_PAGE:
+                yield (region, act_id, candidate)
+
+
+class AccessStats:
+    """Exponentially decayed request count for one page."""
+
+    __slots__ = ("score", "updated")
+
+    def __init__(self):
+        self.score = 0.0
+        self.updated = 0.0
+
+    def current(self, now: float, half_life: float) -> float:
+        if half_life <= 0:
+            return self.score
+        return self.score * 0.5 ** ((now - self.updated) / half_life)
+
+    def hit(self, now: float, half_life: float):
+        self.score = self.current(now, half_life) + 1
+        self.updated = now
+
+
+class Prefetcher:
+    """Learns which leaderboard pages get asked for and picks ones to warm.
+
+    ``record`` is called for every user-facing page request. ``plan`` then
+    ranks pages to fetch ahead of time: neighbours of recently requested pages
+    first (someone looking at page 3 tends to look at 2 and 4 next), then the
+    hottest pages by decayed request count. Pages the caller says are still
+    fresh are skipped, and so are pages that recently failed to prefetch.
+    """
+
+    def __init__(
+        self,
+        half_life: float = PREFETCH_HALF_LIFE,
+        neighbours: int = PREFETCH_NEIGHBOURS,
+        recent: int = PREFETCH_RECENT,
+        max_tracked: int = PREFETCH_MAX_TRACKED,
+    ):
+        self.half_life = half_life
+        self.neighbours = neighbours
+        self.max_tracked = max_tracked
+        self.recent: deque[PageKey] = deque(maxlen=recent)
+        self.stats: dict[PageKey, AccessStats] = {}
+        self.warmed: set[PageKey] = set()
+        # key -> (retry after, consecutive failures)
+        self.failed: dict[PageKey, tuple[float, int]] = {}
+
+    def record(self, region: str, act_id: str, page: int) -> bool:
+        """Count a request. Returns True if the page had been prefetched."""
+        key = (region, act_id, page)
+        now = time.monotonic()
+
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = AccessStats()
+        stats.hit(now, self.half_life)
+
+        self.observe(region, act_id, page)
+
+        if len(self.stats) > self.max_tracked:
+            self.prune(now)
+
+        if key in self.warmed:
+            self.warmed.discard(key)
+            return True
+        return False
+
+    def observe(self, region: str, act_id: str, page: int):
+        """Note a page someone just looked at, so its neighbours are planned.
+
+        Unlike ``record`` it adds nothing to the page's request count. Shards
+        use it for pages requested from another shard next to ones they own.
+        """
+        key = (region, act_id, page)
+        if key in self.recent:
+            self.recent.remove(key)
+        self.recent.append(key)
+
+    def prune(self, now: float):
+        ranked = sorted(
+            self.stats.items(),
+            key=lambda item: item[1].current(now, self.half_life),
+            reverse=True,
+        )
+        self.stats = dict(ranked[: self.max_tracked // 2])
+        self.warmed &= self.stats.keys()
+
+    def neighbours_of(self, key: PageKey):
+        return neighbours(key, self.neighbours)
+
+    def plan(
+        self,
+        budget: int,
+        needs_fetch: Callable[[PageKey], bool],
+        owns: Optional[Callable[[PageKey], bool]] = None,
+    ) -> list[PageKey]:
+        """Up to ``budget`` pages worth warming now, best first."""
+        if budget <= 0:
+            return []
+
+        now = time.monotonic()
+        hottest = sorted(
+            self.stats,
+            key=lambda key: self.stats[key].current(now, self.half_life),
+            reverse=True,
+        )
+        adjacent = (
+            neighbour
+            for key in reversed(self.recent)
+            for neighbour in self.neighbours_of(key)
+        )
+
+        chosen: list[PageKey] = []
+        seen: set[PageKey] = set()
+        for source in (adjacent, hottest):
+            for key in source:
+                if key in seen:
+                    continue
+                seen.add(key)
+                if owns is not None and not owns(key):
+                    continue
+                failure = self.failed.get(key)
+                if failure is not None and failure[0] > now:
+                    continue
+                if not needs_fetch(key):
+                    continue
+                chosen.append(key)
+                if len(chosen) >= budget:
+                    return chosen
+        return chosen
+
+    def mark_warmed(self, key: PageKey):
+        self.failed.pop(key, None)
+        if len(self.warmed) >= self.max_tracked:
+            self.warmed.clear()
+        self.warmed.add(key)
+
+    def mark_failed(self, key: PageKey, cooldown: float = PREFETCH_FAILURE_COOLDOWN):
+        """Back off from a page that could not be fetched, e.g. past the last page."""
+        _, failures = self.failed.get(key, (0.0, 0))
+        delay = min(PREFETCH_FAILURE_COOLDOWN_MAX, cooldown * 2**failures)
+        if len(self.failed) >= self.max_tracked:
+            now = time.monotonic()
+            self.failed = {k: v for k, v in self.failed.items() if v[0] > now}
+        self.failed[key] = (time.monotonic() + delay, failures + 1)
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Optional
+
+PROFILE_CACHE_PATH = os.environ.get("PROFILE_CACHE_PATH", "data/profiles.sqlite3")
+PROFILE_CACHE_TTL = float(os.environ.get("PROFILE_CACHE_TTL", "600"))
+PROFILE_CACHE_STALE_TTL = float(os.environ.get("PROFILE_CACHE_STALE_TTL", "3600"))
+PROFILE_CACHE_NEGATIVE_TTL = float(os.environ.get("PROFILE_CACHE_NEGATIVE_TTL", "120"))
+PROFILE_CACHE_MAX_ENTRIES = int(os.environ.get("PROFILE_CACHE_MAX_ENTRIES", "50000"))
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+EVICT_EVERY = 100
+
+
+def normalize_handle(handle: str) -> str:
+    return handle.strip().casefold()
+
+
+class ProfileCache:
+    """SQLite-backed profile cache with stale-while-revalidate and LRU eviction.
+
+    Entries are fresh for ``ttl`` seconds and may then be served stale for
+    another ``stale_ttl`` seconds while the caller refreshes them. Negative
+    results (unknown players, no competitive data) are kept for
+    ``negative_ttl`` seconds and never served stale. Once the cache holds more
+    than ``max_entries`` rows the least recently read ones are dropped.
+    """
+
+    def __init__(
+        self,
+        path: str = PROFILE_CACHE_PATH,
+        ttl: float = PROFILE_CACHE_TTL,
+        stale_ttl: float = PROFILE_CACHE_STALE_TTL,
+        negative_ttl: float = PROFILE_CACHE_NEGATIVE_TTL,
+        max_entries: int = PROFILE_CACHE_MAX_ENTRIES,
+    ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS profiles (
+                handle TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                fresh_until REAL NOT NULL,
+                stale_until REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS profiles_accessed_at ON profiles (accessed_at)"
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def get(self, handle: str) -> tuple[Optional[dict], str]:
+        """Return ``(result, state)`` where state is FRESH, STALE or MISS."""
+        key = normalize_handle(handle)
+        now = time.time()
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result, fresh_until, stale_until FROM profiles WHERE handle = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None or now > row[2]:
+                return None, MISS
+
+            self._db.execute(
+                "UPDATE profiles SET accessed_at = ? WHERE handle = ?", (now, key)
+            )
+
+        return json.loads(row[0]), FRESH if now <= row[1] else STALE
+
+    def put(self, handle: str, result: dict, negative: bool = False):
+        key = normalize_handle(handle)
+        now = time.time()
+
+        if negative:
+            fresh_until = stale_until = now + self.negative_ttl
+        else:
+            fresh_until = now + self.ttl
+            stale_until = fresh_until + self.stale_ttl
+
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT OR REPLACE INTO profiles (handle, result, fresh_until, stale_until, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, json.dumps(result), fresh_until, stale_until, now),
+            )
+
+            self._puts += 1
+            if self._puts % EVICT_EVERY == 0:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        self._db.execute("DELETE FROM profiles WHERE stale_until < ?", (now,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM profiles").fetchone()
+        if count > self.max_entries:
+            self._db.execute(
+                """
+                DELETE FROM profiles WHERE handle IN (
+                    SELECT handle FROM profiles ORDER BY accessed_at ASC LIMIT ?
+                )
+                """,
+                (count - self.max_entries,),
+            )
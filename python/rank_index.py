@@ -0,0 +1,369 @@
+import sys
+import os
+import json
+import mmap
+import struct
+import time
+import argparse
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import stats_scraper
+import leaderboard_scraper
+from leaderboard_scraper import ACT_ID, validate_region, validate_act_id
+from outbound import BACKGROUND
+
+# File layout (little-endian):
+#   header   MAGIC, version, first_rank, slot_count, entry_count, region, act_id
+#   slots    (slot_count + 1) x u32 offsets into the string table; slot i holds
+#            rank first_rank + i and is empty when offsets[i] == offsets[i + 1]
+#   hashes   entry_count x (u64 riot id hash, u32 rank), sorted by hash
+#   strings  packed UTF-8 Riot IDs
+MAGIC = b"GRRANKIX"
+VERSION = 1
+HEADER = struct.Struct("<8sIIII8s36s")
+OFFSET = struct.Struct("<I")
+HASH_ENTRY = struct.Struct("<QI")
+
+PAGE_SIZE = 100
+INDEX_DIR = os.environ.get("RANK_INDEX_DIR", "data")
+# Tries per page before a crawl gives up, waiting RETRY_BACKOFF * 2**n between.
+CRAWL_ATTEMPTS = int(os.environ.get("RANK_INDEX_CRAWL_ATTEMPTS", "4"))
+RETRY_BACKOFF = float(os.environ.get("RANK_INDEX_RETRY_BACKOFF", "2"))
+
+
+def index_path(region: str, act_id: str = ACT_ID) -> str:
+    return os.path.join(INDEX_DIR, f"leaderboard-{region}-{act_id}.idx")
+
+
+def riot_id_hash(riot_id: str) -> int:
+    digest = hashlib.blake2b(riot_id.casefold().encode("utf-8"), digest_size=8)
+    return int.from_bytes(digest.digest(), "little")
+
+
+def write_rank_index(path: str, items: list[dict], region: str, act_id: str):
+    """Write ``{rank, riotId}`` items to a rank index file at ``path``."""
+    by_rank = {}
+    for item in items:
+        rank = item.get("rank")
+        riot_id = item.get("riotId")
+        if isinstance(rank, int) and rank > 0 and riot_id:
+            by_rank[rank] = riot_id
+
+    first_rank = min(by_rank) if by_rank else 1
+    slot_count = max(by_rank) - first_rank + 1 if by_rank else 0
+
+    offsets = bytearray()
+    strings = bytearray()
+    for rank in range(first_rank, first_rank + slot_count):
+        offsets += OFFSET.pack(len(strings))
+        riot_id = by_rank.get(rank)
+        if riot_id:
+            strings += riot_id.encode("utf-8")
+    offsets += OFFSET.pack(len(strings))
+
+    hashes = bytearray()
+    for key, rank in sorted((riot_id_hash(r), rank) for rank, r in by_rank.items()):
+        hashes += HASH_ENTRY.pack(key, rank)
+
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        first_rank,
+        slot_count,
+        len(by_rank),
+        region.encode("ascii"),
+        act_id.encode("ascii"),
+    )
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(offsets)
+        f.write(hashes)
+        f.write(strings)
+    os.replace(tmp_path, path)
+
+    return len(by_rank)
+
+
+class RankIndex:
+    """Memory-mapped rank index with O(1) rank lookups and O(log n) reverse lookups."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty rank index: {path}")
+
+        (
+            magic,
+            version,
+            self.first_rank,
+            self.slot_count,
+            self.entry_count,
+            region,
+            act_id,
+        ) = HEADER.unpack_from(self._map, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a rank index: {path}")
+
+        self.region = region.rstrip(b"\0").decode("ascii")
+        self.act_id = act_id.rstrip(b"\0").decode("ascii")
+
+        self._offsets_at = HEADER.size
+        self._hashes_at = self._offsets_at + (self.slot_count + 1) * OFFSET.size
+        self._strings_at = self._hashes_at + self.entry_count * HASH_ENTRY.size
+
+    def __len__(self):
+        return self.entry_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def riot_id(self, rank: int) -> Optional[str]:
+        slot = rank - self.first_rank
+        if slot < 0 or slot >= self.slot_count:
+            return None
+
+        start, end = struct.unpack_from(
+            "<II", self._map, self._offsets_at + slot * OFFSET.size
+        )
+        if start == end:
+            return None
+
+        return self._map[self._strings_at + start : self._strings_at + end].decode(
+            "utf-8"
+        )
+
+    def rank_of(self, riot_id: str) -> Optional[int]:
+        key = riot_id_hash(riot_id)
+        wanted = riot_id.casefold()
+
+        low, high = 0, self.entry_count
+        while low < high:
+            mid = (low + high) // 2
+            mid_key, _ = HASH_ENTRY.unpack_from(
+                self._map, self._hashes_at + mid * HASH_ENTRY.size
+            )
+            if mid_key < key:
+                low = mid + 1
+            else:
+                high = mid
+
+        for i in range(low, self.entry_count):
+            entry_key, rank = HASH_ENTRY.unpack_from(
+                self._map, self._hashes_at + i * HASH_ENTRY.size
+            )
+            if entry_key != key:
+                break
+            candidate = self.riot_id(rank)
+            if candidate is not None and candidate.casefold() == wanted:
+                return rank
+
+        return None
+
+
+def is_last_page(result: dict) -> bool:
+    """A successful page shorter than a full page ends the leaderboard."""
+    return "items" in result and len(result["items"]) < PAGE_SIZE
+
+
+def crawl_failed(page_num: int):
+    raise RuntimeError(
+        f"Page {page_num} failed after {CRAWL_ATTEMPTS} attempts, not writing a partial index"
+    )
+
+
+def retry_delay(page_num: int, attempt: int, result: dict) -> float:
+    delay = RETRY_BACKOFF * 2 ** (attempt - 1)
+    print(
+        f"[INDEX] Page {page_num} failed ({result.get('error')}), retrying in {delay:g}s",
+        file=sys.stderr,
+    )
+    return delay
+
+
+async def crawl_browser(region: str, act_id: str, max_pages: int, batch: int):
+    items = []
+    start = 1
+    try:
+        while start <= max_pages:
+            pages = list(range(start, min(start + batch, max_pages + 1)))
+            results = {}
+            async for page_num, result in leaderboard_scraper.get_leaderboard_pages(
+                region, pages, act_id, priority=BACKGROUND
+            ):
+                results[page_num] = result
+
+            for page_num in pages:
+                result = results[page_num]
+                attempt = 1
+                while "items" not in result:
+                    if attempt >= CRAWL_ATTEMPTS:
+                        crawl_failed(page_num)
+                    await asyncio.sleep(retry_delay(page_num, attempt, result))
+                    attempt += 1
+                    result = await leaderboard_scraper.get_leaderboard(
+                        region, page_num, act_id, priority=BACKGROUND
+                    )
+
+                items.extend(result["items"])
+                if is_last_page(result):
+                    print(f"[INDEX] Last page is {page_num}", file=sys.stderr)
+                    return items
+
+            start += batch
+        return items
+    finally:
+        await leaderboard_scraper.shutdown()
+
+
+def crawl_http(region: str, act_id: str, max_pages: int, batch: int):
+    items = []
+    start = 1
+    with ThreadPoolExecutor(max_workers=batch) as executor:
+        while start <= max_pages:
+            pages = list(range(start, min(start + batch, max_pages + 1)))
+            results = executor.map(
+                lambda p: stats_scraper.get_leaderboard(region, p, act_id, BACKGROUND),
+                pages,
+            )
+
+            for page_num, result in zip(pages, results):
+                attempt = 1
+                while "items" not in result:
+                    if attempt >= CRAWL_ATTEMPTS:
+                        crawl_failed(page_num)
+                    time.sleep(retry_delay(page_num, attempt, result))
+                    attempt += 1
+                    result = stats_scraper.get_leaderboard(
+                        region, page_num, act_id, BACKGROUND
+                    )
+
+                items.extend(result["items"])
+                if is_last_page(result):
+                    print(f"[INDEX] Last page is {page_num}", file=sys.stderr)
+                    return items
+
+            start += batch
+    return items
+
+
+def build_rank_index(
+    region: str,
+    act_id: str = ACT_ID,
+    path: Optional[str] = None,
+    max_pages: int = 10000,
+    batch: int = 8,
+    source: str = "browser",
+):
+    """Crawl a whole region/act leaderboard and write its rank index."""
+    validated_region = validate_region(region)
+    validated_act_id = validate_act_id(act_id)
+    path = path or index_path(validated_region, validated_act_id)
+
+    print(
+        f"[INDEX] Crawling {validated_region} over {source} (up to {max_pages} pages)",
+        file=sys.stderr,
+    )
+
+    if source == "http":
+        items = crawl_http(validated_region, validated_act_id, max_pages, batch)
+    else:
+        items = asyncio.run(
+            crawl_browser(validated_region, validated_act_id, max_pages, batch)
+        )
+
+    count = write_rank_index(path, items, validated_region, validated_act_id)
+    print(f"[INDEX] Wrote {count} players to {path}", file=sys.stderr)
+    return {"path": path, "players": count}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Valorant leaderboard rank index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser(
+        "build", help="Crawl a region and write its rank index"
+    )
+    build_parser.add_argument("region", type=str, help="Server region")
+    build_parser.add_argument(
+        "act_id", type=str, nargs="?", default=ACT_ID, help="Valorant Act ID"
+    )
+    build_parser.add_argument("--out", type=str, help="Index file path")
+    build_parser.add_argument(
+        "--max-pages", type=int, default=10000, help="Maximum pages to crawl"
+    )
+    build_parser.add_argument(
+        "--batch", type=int, default=8, help="Pages fetched per crawl step"
+    )
+    build_parser.add_argument(
+        "--source",
+        choices=("browser", "http"),
+        default="browser",
+        help="Scrape pages with Playwright or with curl_cffi",
+    )
+
+    rank_parser = subparsers.add_parser("rank", help="Look up the player at a rank")
+    rank_parser.add_argument("path", type=str, help="Index file path")
+    rank_parser.add_argument("rank", type=int, help="Leaderboard rank")
+
+    player_parser = subparsers.add_parser("player", help="Look up a player's rank")
+    player_parser.add_argument("path", type=str, help="Index file path")
+    player_parser.add_argument("riot_id", type=str, help="Player Riot ID")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            result = build_rank_index(
+                args.region,
+                args.act_id,
+                args.out,
+                min(max(1, args.max_pages), 10000),
+                max(1, args.batch),
+                args.source,
+            )
+            print(json.dumps(result))
+
+        elif args.command == "rank":
+            with RankIndex(args.path) as index:
+                riot_id = index.riot_id(args.rank)
+            if riot_id:
+                print(json.dumps({"rank": args.rank, "riotId": riot_id}))
+            else:
+                print(json.dumps({"error": "Rank not found"}))
+
+        elif args.command == "player":
+            with RankIndex(args.path) as index:
+                rank = index.rank_of(args.riot_id)
+                riot_id = index.riot_id(rank) if rank else None
+            if rank:
+                print(json.dumps({"rank": rank, "riotId": riot_id}))
+            else:
+                print(json.dumps({"error": "Player not found"}))
+
+    except (ValueError, OSError, RuntimeError) as e:
+        print(f"[INDEX] Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"[INDEX] Internal error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
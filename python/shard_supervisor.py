@@ -0,0 +1,432 @@
+import os
+import sys
+import json
+import time
+import asyncio
+from typing import Optional
+
+from hashring import HashRing, page_key
+from leaderboard_scraper import ACT_ID, plan_jobs, write_response
+from metrics import metrics
+from prefetch import PREFETCH_NEIGHBOURS, neighbours
+
+SCRAPER_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "leaderboard_scraper.py"
+)
+# Rough resident size of one shard: Python, the Playwright driver and Chromium.
+SHARD_MEMORY_MB = float(os.environ.get("LEADERBOARD_SHARD_MEMORY_MB", "700"))
+RESTART_BACKOFF_MAX = 30.0
+# A shard that stayed up this long has its crash backoff reset.
+STABLE_AFTER = 60.0
+MAX_ATTEMPTS = 2
+LINE_LIMIT = 16 * 1024 * 1024
+
+
+def available_memory_mb() -> Optional[float]:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def default_shard_count() -> int:
+    """One shard per core, capped by how many browsers fit in free memory."""
+    cores = os.cpu_count() or 1
+    memory = available_memory_mb()
+    by_memory = int(memory // SHARD_MEMORY_MB) if memory else cores
+    return max(1, min(cores, by_memory))
+
+
+class Request:
+    """A client request, split into one part per shard that owns some of it."""
+
+    def __init__(self, request_id, kind: str, region=None, act_id=None):
+        self.id = request_id
+        self.kind = kind
+        self.region = region
+        self.act_id = act_id
+        self.open_parts = 0
+        self.results = []
+
+
+class Part:
+    """The slice of a request sent to one shard: the pages it still owes."""
+
+    def __init__(self, request: Request, items: list, payload: Optional[dict] = None):
+        self.request = request
+        self.remaining = dict.fromkeys(items)
+        self.payload_override = payload
+        self.attempts = 0
+
+    def payload(self) -> dict:
+        if self.payload_override is not None:
+            return self.payload_override
+
+        items = list(self.remaining)
+        if self.request.kind == "page":
+            region, act_id, page_num = items[0]
+            return {"region": region, "act_id": act_id, "page": page_num}
+        if self.request.kind == "pages":
+            region, act_id, _ = items[0]
+            return {
+                "region": region,
+                "act_id": act_id,
+                "pages": [page_num for _, _, page_num in items],
+            }
+        return {
+            "jobs": [
+                {"region": region, "act_id": act_id, "page": page_num}
+                for region, act_id, page_num in items
+            ]
+        }
+
+
+class Shard:
+    def __init__(self, index: int, count: int):
+        self.index = index
+        self.count = count
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.pending: dict[int, Part] = {}
+        self.next_id = 1
+        self.crashes = 0
+        self.started_at = 0.0
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec(
+            sys.executable,
+            SCRAPER_PATH,
+            "serve",
+            "--shard",
+            f"{self.index}/{self.count}",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=LINE_LIMIT,
+        )
+        self.started_at = time.monotonic()
+        print(
+            f"[SUPERVISOR] Shard {self.index} started (pid {self.proc.pid})",
+            file=sys.stderr,
+        )
+
+    async def send(self, part: Part):
+        shard_id = self.next_id
+        self.next_id += 1
+        self.pending[shard_id] = part
+        part.attempts += 1
+
+        try:
+            self.proc.stdin.write(
+                (json.dumps({**part.payload(), "id": shard_id}) + "\n").encode("utf-8")
+            )
+            await self.proc.stdin.drain()
+        except (ConnectionError, RuntimeError) as e:
+            # The shard is dying; its watcher resends or fails the part.
+            print(f"[SUPERVISOR] Shard {self.index} write failed: {e}", file=sys.stderr)
+
+    async def notify(self, message: dict):
+        """Write a line the shard never answers, such as a prefetch hint."""
+        try:
+            self.proc.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+            await self.proc.stdin.drain()
+        except (ConnectionError, RuntimeError) as e:
+            print(f"[SUPERVISOR] Shard {self.index} write failed: {e}", file=sys.stderr)
+
+
+class Supervisor:
+    """Runs K ``leaderboard_scraper.py serve`` shards behind one NDJSON stream.
+
+    Pages are routed by a consistent hash of ``region:page``, so the same page
+    always lands on the same shard and its browser. Multi-page and batch
+    requests are split per shard and their lines merged back under the
+    client's id. A shard that exits is restarted with backoff, and the pages
+    it still owed are resent once before being answered with an error.
+
+    Neighbours of a requested page usually hash to other shards, so each
+    interactive request is also passed as a ``{"op": "seen"}`` hint to the
+    shards owning its neighbours, letting them prefetch those pages.
+    """
+
+    def __init__(self, count: int):
+        self.ring = HashRing(count)
+        self.shards = [Shard(index, count) for index in range(count)]
+        self.closing = False
+        self.open_requests = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    async def run(self, reader: asyncio.StreamReader):
+        for shard in self.shards:
+            await shard.start()
+        watchers = [asyncio.create_task(self.watch(shard)) for shard in self.shards]
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Request must be an object")
+                except ValueError as e:
+                    print(f"[SUPERVISOR] Malformed request: {e}", file=sys.stderr)
+                    write_response(
+                        {
+                            "id": None,
+                            "result": {"error": "Invalid request"},
+                            "done": True,
+                        }
+                    )
+                    continue
+
+                await self.dispatch(request)
+
+            await self.idle.wait()
+        finally:
+            self.closing = True
+            for shard in self.shards:
+                if shard.proc is not None and shard.proc.stdin is not None:
+                    shard.proc.stdin.close()
+            await asyncio.gather(*watchers, return_exceptions=True)
+
+    def split(self, request: dict) -> tuple[str, dict[int, list]]:
+        """Work out the request kind and which shard owns which pages."""
+        if "jobs" in request:
+            jobs = request["jobs"]
+            if not isinstance(jobs, list):
+                raise TypeError("jobs must be a list")
+            kind, items = "jobs", plan_jobs(jobs)
+        elif "pages" in request:
+            if not isinstance(request["pages"], list):
+                raise TypeError("pages must be a list")
+            job = {
+                "region": request["region"],
+                "act_id": request.get("act_id") or ACT_ID,
+                "pages": request["pages"],
+            }
+            kind, items = "pages", plan_jobs([job])
+        else:
+            job = {
+                "region": request["region"],
+                "act_id": request.get("act_id") or ACT_ID,
+                "page": request["page"],
+            }
+            kind, items = "page", plan_jobs([job])
+
+        owned: dict[int, list] = {}
+        for item in items:
+            owner = self.ring.node_for(page_key(item[0], item[2]))
+            owned.setdefault(owner, []).append(item)
+        return kind, owned
+
+    async def dispatch(self, request: dict):
+        request_id = request.get("id")
+
+        if request.get("op") == "metrics":
+            parent = Request(request_id, "op")
+            payload = {"op": "metrics", "format": request.get("format")}
+            assignments = {
+                shard.index: Part(parent, [], payload) for shard in self.shards
+            }
+        else:
+            try:
+                kind, owned = self.split(request)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"[SUPERVISOR] Invalid request: {e}", file=sys.stderr)
+                write_response(
+                    {
+                        "id": request_id,
+                        "result": {"error": "Invalid request"},
+                        "done": True,
+                    }
+                )
+                return
+            first = next(iter(owned.values()), [(None, None, None)])[0]
+            parent = Request(request_id, kind, first[0], first[1])
+            assignments = {index: Part(parent, items) for index, items in owned.items()}
+
+        if not assignments:
+            write_response({"id": request_id, "done": True})
+            return
+
+        parent.open_parts = len(assignments)
+        self.open_requests += 1
+        self.idle.clear()
+        for index, part in assignments.items():
+            await self.shards[index].send(part)
+
+        if parent.kind in ("page", "pages"):
+            await self.hint_neighbours(owned)
+
+    async def hint_neighbours(self, owned: dict[int, list]):
+        """Tell the owners of requested pages' neighbours what was requested."""
+        for owner, items in owned.items():
+            for item in items:
+                hinted = {owner}
+                for region, _, page in neighbours(item, PREFETCH_NEIGHBOURS):
+                    index = self.ring.node_for(page_key(region, page))
+                    if index in hinted:
+                        continue
+                    hinted.add(index)
+                    await self.shards[index].notify(
+                        {
+                            "op": "seen",
+                            "region": item[0],
+                            "act_id": item[1],
+                            "page": item[2],
+                        }
+                    )
+
+    async def watch(self, shard: Shard):
+        """Relay a shard's output, restarting it whenever it exits."""
+        while True:
+            while True:
+                line = await shard.proc.stdout.readline()
+                if not line:
+                    break
+                try:
+                    self.relay(shard, json.loads(line))
+                except ValueError:
+                    print(
+                        f"[SUPERVISOR] Ignoring malformed output from shard {shard.index}",
+                        file=sys.stderr,
+                    )
+
+            code = await shard.proc.wait()
+            if self.closing:
+                return
+
+            print(
+                f"[SUPERVISOR] Shard {shard.index} exited with {code}, restarting",
+                file=sys.stderr,
+            )
+            metrics.incr("shard_restarts", shard=shard.index)
+
+            if time.monotonic() - shard.started_at > STABLE_AFTER:
+                shard.crashes = 0
+            shard.crashes += 1
+            await asyncio.sleep(min(RESTART_BACKOFF_MAX, 2 ** (shard.crashes - 1)))
+
+            orphans = list(shard.pending.values())
+            shard.pending.clear()
+            await shard.start()
+
+            for part in orphans:
+                if part.attempts < MAX_ATTEMPTS:
+                    await shard.send(part)
+                else:
+                    self.fail(part)
+
+    def relay(self, shard: Shard, message: dict):
+        shard_id = message.get("id")
+        if shard_id is None:
+            if message.get("event"):
+                write_response(message)
+            return
+
+        part = shard.pending.get(shard_id)
+        if part is None:
+            return
+        request = part.request
+
+        if request.kind in ("pages", "jobs") and "page" in message:
+            if request.kind == "jobs":
+                key = (message.get("region"), message.get("act_id"), message["page"])
+            else:
+                key = (request.region, request.act_id, message["page"])
+            part.remaining.pop(key, None)
+            self.write_page(request, key, message.get("result"))
+
+        if not message.get("done"):
+            return
+
+        del shard.pending[shard_id]
+        if request.kind in ("page", "op"):
+            request.results.append(message.get("result"))
+        self.finish(part)
+
+    def write_page(self, request: Request, key: tuple, result):
+        region, act_id, page_num = key
+        if request.kind == "jobs":
+            write_response(
+                {
+                    "id": request.id,
+                    "region": region,
+                    "act_id": act_id,
+                    "page": page_num,
+                    "result": result,
+                }
+            )
+        else:
+            write_response({"id": request.id, "page": page_num, "result": result})
+
+    def fail(self, part: Part):
+        error = {"error": "Service temporarily unavailable"}
+        request = part.request
+        if request.kind in ("pages", "jobs"):
+            for key in part.remaining:
+                self.write_page(request, key, error)
+        else:
+            request.results.append(error)
+        part.remaining.clear()
+        self.finish(part)
+
+    def finish(self, part: Part):
+        request = part.request
+        request.open_parts -= 1
+        if request.open_parts > 0:
+            return
+
+        if request.kind == "page":
+            write_response(
+                {"id": request.id, "result": request.results[0], "done": True}
+            )
+        elif request.kind == "op":
+            write_response(
+                {
+                    "id": request.id,
+                    "result": merge_metrics(request.results),
+                    "done": True,
+                }
+            )
+        else:
+            write_response({"id": request.id, "done": True})
+
+        self.open_requests -= 1
+        if self.open_requests == 0:
+            self.idle.set()
+
+
+def merge_metrics(results: list) -> dict:
+    """One metrics result from every shard's, plus the supervisor's own.
+
+    Prometheus texts come back unmerged under ``"texts"``; the server merges
+    them with its other workers' into one exposition.
+    """
+    texts = [r["text"] for r in results if isinstance(r, dict) and "text" in r]
+    if texts:
+        return {"texts": texts + [metrics.prometheus()]}
+    return {"shards": results, "supervisor": metrics.snapshot()}
+
+
+async def supervise(count: int):
+    """Serve stdin/stdout requests through ``count`` leaderboard shards."""
+    metrics.set_labels(scraper="supervisor")
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=LINE_LIMIT)
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+    )
+
+    print(
+        f"[SUPERVISOR] Serving requests on stdin with {count} shards", file=sys.stderr
+    )
+    await Supervisor(count).run(reader)
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is still running block until it finishes and get the same result (or
+    exception). Thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future] = {}
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: str, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+
+        if not leader:
+            return call.result()
+
+        try:
+            result = fn(*args)
+            call.set_result(result)
+            return result
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of ``SingleFlight`` for use on one event loop.
+
+    The shared work runs as its own task, so a caller being cancelled does
+    not cancel it for everyone else waiting on the same key.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Future] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, coro_fn, *args):
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(coro_fn(*args))
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._forget(key, call))
+        return await asyncio.shield(call)
+
+    def _forget(self, key: str, call: asyncio.Future):
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -3,16 +3,82 @@ import json
 import urllib.parse
 import re
 import argparse
+import asyncio
+import os
+import random
+import threading
 import time
-from typing import Literal
-from curl_cffi import requests
-from playwright.sync_api import sync_playwright
-
-API_BASE_URL = "https://api.tracker.gg/api/v2/valorant/standard/profile/riot/"
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal, Optional
+from metrics import metrics
+from output import add_format_argument, open_writer
+from outbound import (
+    API_HOST,
+    BACKGROUND,
+    BLOCK_STATUSES,
+    INTERACTIVE,
+    SITE_HOST,
+    curl_requests,
+    host_of,
+    scheduler,
+)
+from history import record_snapshot
+from profile_cache import (
+    FRESH,
+    MISS,
+    PROFILE_CACHE_PATH,
+    STALE,
+    ProfileCache,
+    normalize_handle,
+)
+from singleflight import AsyncSingleFlight, SingleFlight
+from tracker_parse import (
+    PROFILE_STATS,
+    LeaderboardStream,
+    extract_leaderboard_items,
+    extract_profile_stats,
+    parse_leaderboard_rows,
+)
+
+API_BASE_URL = os.environ.get(
+    "TRACKER_API_BASE_URL",
+    "https://api.tracker.gg/api/v2/valorant/standard/profile/riot/",
+)
+LEADERBOARD_URL = os.environ.get(
+    "TRACKER_LEADERBOARD_URL",
+    "https://tracker.gg/valorant/leaderboards/ranked/all/default",
+)
+
+ACT_ID = os.environ.get("VALORANT_ACT_ID", "4c4b8cff-43eb-13d3-8f14-96b783c90cd2")
 
 AllowedRegion = Literal["na", "eu", "ap", "kr", "br", "latam"]
 ALLOWED_REGIONS: tuple[AllowedRegion, ...] = ("na", "eu", "ap", "kr", "br", "latam")
 
+STATS_WORKER_THREADS = int(os.environ.get("STATS_WORKER_THREADS", "8"))
+BATCH_CONCURRENCY = int(os.environ.get("STATS_BATCH_CONCURRENCY", "8"))
+FINGERPRINT_WINDOW = int(os.environ.get("STATS_FINGERPRINT_WINDOW", "50"))
+# Extra competitive stats (e.g. "headshotsPercentage,damagePerRound") returned
+# under "stats" as raw values. Empty keeps the response shape unchanged.
+PROFILE_EXTRA_FIELDS = tuple(
+    field.strip()
+    for field in os.environ.get("STATS_PROFILE_EXTRA_FIELDS", "").split(",")
+    if field.strip()
+)
+# Requested stat names must look like tracker.gg's camelCase keys.
+FIELD_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9]{0,63}$")
+MAX_PROFILE_FIELDS = 32
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 4.0
+
+_local = threading.local()
+_profile_cache: Optional[ProfileCache] = None
+_refresher: Optional[ThreadPoolExecutor] = None
+_refreshing: set[str] = set()
+_refresh_lock = threading.Lock()
+_profile_fetches = SingleFlight()
+_async_profile_fetches = AsyncSingleFlight()
+
 BROWSER_CONFIGS = [
     {
         "impersonate": "chrome124",
@@ -32,6 +98,75 @@ BROWSER_CONFIGS = [
 ]
 
 
+class FingerprintStats:
+    """Success rate and latency per impersonation profile over a sliding window.
+
+    Profiles are tried best-first: highest smoothed success rate, then lowest
+    average latency. With no data yet they keep their ``BROWSER_CONFIGS`` order.
+    """
+
+    def __init__(self, window: int = FINGERPRINT_WINDOW):
+        self._lock = threading.Lock()
+        self._outcomes: dict[str, deque] = {}
+        self._window = window
+
+    def record(self, impersonate: str, success: bool, latency: float):
+        with self._lock:
+            outcomes = self._outcomes.get(impersonate)
+            if outcomes is None:
+                outcomes = self._outcomes[impersonate] = deque(maxlen=self._window)
+            outcomes.append((success, latency))
+
+    def _score(self, browser_config: dict):
+        outcomes = self._outcomes.get(browser_config["impersonate"], ())
+        successes = sum(1 for success, _ in outcomes if success)
+        success_rate = (successes + 1) / (len(outcomes) + 2)
+        latency = (
+            sum(latency for _, latency in outcomes) / len(outcomes) if outcomes else 0.0
+        )
+        return -success_rate, latency
+
+    def ordered(self, configs: list[dict]) -> list[dict]:
+        with self._lock:
+            return sorted(configs, key=self._score)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = {}
+            for browser_config in BROWSER_CONFIGS:
+                impersonate = browser_config["impersonate"]
+                outcomes = self._outcomes.get(impersonate, ())
+                successes = sum(1 for success, _ in outcomes if success)
+                stats[impersonate] = {
+                    "attempts": len(outcomes),
+                    "success_rate": (
+                        round(successes / len(outcomes), 3) if outcomes else None
+                    ),
+                    "avg_latency_ms": (
+                        round(
+                            1000
+                            * sum(latency for _, latency in outcomes)
+                            / len(outcomes)
+                        )
+                        if outcomes
+                        else None
+                    ),
+                }
+            return stats
+
+
+_fingerprints = FingerprintStats()
+
+
+def get_fingerprint_stats() -> dict:
+    return _fingerprints.snapshot()
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number ``attempt``."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
 def validate_region(region: str) -> AllowedRegion:
     region = region.lower().strip()
     if region not in ALLOWED_REGIONS:
@@ -70,103 +205,482 @@ def validate_handle(handle: str) -> bool:
     return True
 
 
-def get_player_stats(handle: str):
-    url = f"{API_BASE_URL}{urllib.parse.quote(handle)}"
+def validate_fields(fields) -> tuple[str, ...]:
+    """Requested extra stats as a tuple without repeats.
+
+    None means the ``STATS_PROFILE_EXTRA_FIELDS`` default.
+    """
+    if fields is None:
+        return PROFILE_EXTRA_FIELDS
+    if not isinstance(fields, (list, tuple)) or len(fields) > MAX_PROFILE_FIELDS:
+        raise ValueError("fields must be a list of stat names")
+    for field in fields:
+        if not isinstance(field, str) or not FIELD_PATTERN.match(field):
+            raise ValueError(f"Invalid field: {field}")
+    return tuple(dict.fromkeys(fields))
+
+
+def get_session(impersonate: str):
+    """Return this thread's keep-alive session for an impersonation profile.
+
+    curl_cffi sessions are not thread-safe, so each worker thread keeps one
+    session per profile and reuses its HTTP/2 connections across requests.
+    """
+    sessions = getattr(_local, "sessions", None)
+    if sessions is None:
+        sessions = _local.sessions = {}
+
+    session = sessions.get(impersonate)
+    if session is None:
+        session = sessions[impersonate] = curl_requests().Session(
+            impersonate=impersonate
+        )
+    return session
+
+
+def get_profile_headers(browser_config: dict):
+    return {
+        "Accept": "application/json, text/plain, */*",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Referer": "https://tracker.gg/",
+        "User-Agent": browser_config["user_agent"],
+    }
+
+
+def profile_url(handle: str) -> str:
+    return f"https://tracker.gg/valorant/profile/riot/{urllib.parse.quote(handle)}/overview"
 
-    for attempt, browser_config in enumerate(BROWSER_CONFIGS, 1):
-        headers = {
-            "Accept": "application/json, text/plain, */*",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Referer": "https://tracker.gg/",
-            "User-Agent": browser_config["user_agent"],
+
+def for_handle(result: dict, handle: str) -> dict:
+    """``result`` with the requester's casing of ``handle``.
+
+    Cached and coalesced results are shared by every casing of a Riot ID, so
+    they carry whichever one was fetched first.
+    """
+    if "riot_id" not in result:
+        return result
+    return {**result, "riot_id": handle, "tracker_url": profile_url(handle)}
+
+
+def cached_fields(result: Optional[dict]) -> tuple[str, ...]:
+    """The extra stats a cached result was fetched with."""
+    return tuple((result or {}).get("stats") or ())
+
+
+def covers(result: dict, fields: tuple[str, ...]) -> bool:
+    """True if a cached result can answer a request for ``fields``.
+
+    Errors don't depend on the fields asked for.
+    """
+    return "error" in result or set(fields) <= set(cached_fields(result))
+
+
+def for_request(result: dict, handle: str, fields: tuple[str, ...]) -> dict:
+    """``for_handle`` with ``stats`` cut down to the requested ``fields``.
+
+    A cached entry may hold more fields than this request asked for.
+    """
+    result = for_handle(result, handle)
+    if "riot_id" not in result:
+        return result
+    stats = result.get("stats") or {}
+    result = {key: value for key, value in result.items() if key != "stats"}
+    if fields:
+        result["stats"] = {field: stats.get(field) for field in fields}
+    return result
+
+
+def flight_key(handle: str, fields: tuple[str, ...]) -> str:
+    return f"{normalize_handle(handle)}|{','.join(fields)}"
+
+
+def parse_profile(
+    handle: str, body: str, extra_fields: tuple[str, ...] = PROFILE_EXTRA_FIELDS
+):
+    """Build the stats result from a raw profile response body.
+
+    Only the competitive segment is decoded, and only ``PROFILE_STATS`` plus
+    ``extra_fields`` are read from it.
+    """
+    stats = extract_profile_stats(body, PROFILE_STATS + extra_fields)
+    if stats is None:
+        print(f"[STATS] No competitive data for {handle}", file=sys.stderr)
+        return {"error": "Service temporarily unavailable"}
+
+    rank = "Unknown"
+    if stats.get("rank"):
+        meta = stats["rank"].get("metadata", {})
+        rank = f"{meta.get('tierName', 'Unknown')} {stats['rank'].get('value', 0)}RR"
+    elif stats.get("tier"):
+        rank = stats["tier"].get("displayValue", "Unknown")
+
+    result = {
+        "riot_id": handle,
+        "current_rank": rank,
+        "kd": f"{(stats.get('kDRatio') or {}).get('value', 0):.2f}",
+        "wr": f"{(stats.get('matchesWinPct') or {}).get('value', 0):.1f}%",
+        "wins": int((stats.get("matchesWon") or {}).get("value", 0)),
+        "games_played": int((stats.get("matchesPlayed") or {}).get("value", 0)),
+        "tracker_url": profile_url(handle),
+    }
+    if extra_fields:
+        result["stats"] = {
+            field: (stats.get(field) or {}).get("value") for field in extra_fields
         }
+    return result
+
+
+def profile_attempts(handle: str):
+    """Yield ``(attempt, browser_config, headers)`` for each fingerprint to try."""
+    for attempt, browser_config in enumerate(_fingerprints.ordered(BROWSER_CONFIGS), 1):
+        print(
+            f"[STATS] Attempt {attempt}/{len(BROWSER_CONFIGS)}: {browser_config['impersonate']} for {handle}",
+            file=sys.stderr,
+        )
+        yield attempt, browser_config, get_profile_headers(browser_config)
+
+
+def retry_or_fail(attempt: int):
+    """None if another attempt follows, else the final failure."""
+    if attempt < len(BROWSER_CONFIGS):
+        metrics.incr("retries")
+        return None
+    metrics.incr("failures")
+    return {"error": "Service temporarily unavailable"}, False
+
+
+def profile_response(
+    handle: str,
+    attempt: int,
+    browser_config: dict,
+    host: str,
+    started: float,
+    resp,
+    fields: tuple[str, ...],
+):
+    """Handle one attempt's response.
+
+    Returns ``(result, negative)``, or None when the caller should back off
+    and try the next fingerprint.
+    """
+    _fingerprints.record(
+        browser_config["impersonate"],
+        resp.status_code in (200, 404),
+        time.monotonic() - started,
+    )
+    scheduler.record_status(host, resp.status_code)
+
+    if resp.status_code == 404:
+        print(f"[STATS] Player not found for {handle}", file=sys.stderr)
+        return {"error": "Service temporarily unavailable"}, True
+
+    if resp.status_code != 200:
+        print(
+            f"[STATS] Attempt {attempt} failed: HTTP {resp.status_code}",
+            file=sys.stderr,
+        )
+        if resp.status_code in BLOCK_STATUSES:
+            metrics.incr("challenges", tier="api")
+        return retry_or_fail(attempt)
+
+    with metrics.span("profile_parse"):
+        result = parse_profile(handle, resp.content.decode("utf-8"), fields)
+    if "error" not in result:
+        print(f"[STATS] Success on attempt {attempt} for {handle}", file=sys.stderr)
+    return result, "error" in result
+
+
+def profile_error(attempt: int, browser_config: dict, started: float, error: Exception):
+    """Handle an attempt that raised; same return as ``profile_response``."""
+    _fingerprints.record(
+        browser_config["impersonate"], False, time.monotonic() - started
+    )
+    print(f"[STATS] Attempt {attempt} exception: {str(error)}", file=sys.stderr)
+    metrics.incr("errors", tier="api")
+    return retry_or_fail(attempt)
+
+
+def fetch_player_stats(
+    handle: str,
+    priority: int = INTERACTIVE,
+    fields: tuple[str, ...] = PROFILE_EXTRA_FIELDS,
+):
+    """Fetch a profile from tracker.gg, bypassing the cache.
+
+    ``fields`` are the extra stats returned under ``"stats"``. Returns ``(result, negative)`` where ``negative`` marks a definitive miss
+    (unknown player or no competitive data) that is safe to cache briefly.
+    """
+    url = f"{API_BASE_URL}{urllib.parse.quote(handle)}"
+    host = host_of(url)
+
+    for attempt, browser_config, headers in profile_attempts(handle):
+        with metrics.span("rate_wait"):
+            scheduler.acquire(host, priority)
+        started = time.monotonic()
 
         try:
-            print(
-                f"[STATS] Attempt {attempt}/{len(BROWSER_CONFIGS)}: {browser_config['impersonate']} for {handle}",
-                file=sys.stderr,
+            with metrics.span(
+                "profile_attempt", impersonate=browser_config["impersonate"]
+            ):
+                resp = get_session(browser_config["impersonate"]).get(
+                    url,
+                    headers=headers,
+                    timeout=browser_config["timeout"],
+                )
+            outcome = profile_response(
+                handle, attempt, browser_config, host, started, resp, fields
             )
+        except Exception as e:
+            outcome = profile_error(attempt, browser_config, started, e)
 
-            resp = requests.get(
-                url,
-                headers=headers,
-                impersonate=browser_config["impersonate"],
-                timeout=browser_config["timeout"],
-            )
+        if outcome is not None:
+            return outcome
+        time.sleep(backoff_delay(attempt))
 
-            if resp.status_code == 404:
-                print(f"[STATS] Player not found for {handle}", file=sys.stderr)
-                return {"error": "Service temporarily unavailable"}
+    return {"error": "Service temporarily unavailable"}, False
 
-            if resp.status_code != 200:
-                print(
-                    f"[STATS] Attempt {attempt} failed: HTTP {resp.status_code}",
-                    file=sys.stderr,
-                )
-                if attempt < len(BROWSER_CONFIGS):
-                    time.sleep(1)
-                    continue
-                return {"error": "Service temporarily unavailable"}
 
-            data = resp.json().get("data", {})
-            if not data:
-                print(f"[STATS] No data found for {handle}", file=sys.stderr)
-                return {"error": "Service temporarily unavailable"}
+def get_profile_cache() -> Optional[ProfileCache]:
+    global _profile_cache
 
-            segments = data.get("segments", [])
+    if _profile_cache is None and PROFILE_CACHE_PATH:
+        _profile_cache = ProfileCache()
+    return _profile_cache
 
-            comp = next((s for s in segments if s.get("type") == "season"), None)
-            if not comp:
-                comp = next(
-                    (s for s in segments if s.get("stats", {}).get("rank")), None
-                )
 
-            if not comp:
-                print(f"[STATS] No competitive data for {handle}", file=sys.stderr)
-                return {"error": "Service temporarily unavailable"}
+def store_profile(handle: str, result: dict, negative: bool):
+    """Cache a fetched profile. Transient failures are never cached."""
+    cache = get_profile_cache()
+    if cache is None or ("error" in result and not negative):
+        return
+    cache.put(handle, result, negative=negative)
 
-            stats = comp.get("stats", {})
 
-            rank = "Unknown"
-            if stats.get("rank"):
-                meta = stats["rank"].get("metadata", {})
-                rank = f"{meta.get('tierName', 'Unknown')} {stats['rank'].get('value', 0)}RR"
-            elif stats.get("tier"):
-                rank = stats["tier"].get("displayValue", "Unknown")
+def fetch_player_stats_shared(
+    handle: str,
+    priority: int = INTERACTIVE,
+    fields: tuple[str, ...] = PROFILE_EXTRA_FIELDS,
+):
+    """``fetch_player_stats`` with concurrent calls for one handle collapsed."""
+    return _profile_fetches.do(
+        flight_key(handle, fields), fetch_player_stats, handle, priority, fields
+    )
+
 
-            print(f"[STATS] Success on attempt {attempt} for {handle}", file=sys.stderr)
+def refresh_player_stats(handle: str, fields: tuple[str, ...]):
+    try:
+        result, negative = fetch_player_stats_shared(handle, BACKGROUND, fields)
+        store_profile(handle, result, negative)
+    except Exception as e:
+        print(f"[STATS] Background refresh failed for {handle}: {e}", file=sys.stderr)
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(normalize_handle(handle))
+
+
+def schedule_refresh(handle: str, fields: tuple[str, ...]):
+    global _refresher
+
+    key = normalize_handle(handle)
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        if _refresher is None:
+            _refresher = ThreadPoolExecutor(max_workers=2)
+
+    _refresher.submit(refresh_player_stats, handle, fields)
+
+
+def get_player_stats(handle: str, fields: Optional[list[str]] = None):
+    """Return a player's stats, serving cached and stale entries when possible.
+
+    ``fields`` are extra stats returned under ``"stats"``, defaulting to
+    ``STATS_PROFILE_EXTRA_FIELDS``. A cached entry only answers requests for
+    fields it holds; otherwise the profile is refetched with both sets.
+    Stale entries are returned immediately and refreshed on a background
+    thread.
+    """
+    fields = validate_fields(fields)
+    cache = get_profile_cache()
+    if cache is None:
+        result, _ = fetch_player_stats_shared(handle, INTERACTIVE, fields)
+        return for_request(result, handle, fields)
+
+    cached, state = cache.get(handle)
+    if state != MISS and not covers(cached, fields):
+        state = MISS
+    if state == FRESH:
+        print(f"[STATS] Cache hit for {handle}", file=sys.stderr)
+        metrics.incr("cache", cache="profile", result="hit")
+        return for_request(cached, handle, fields)
+    if state == STALE:
+        print(f"[STATS] Serving stale entry for {handle}", file=sys.stderr)
+        metrics.incr("cache", cache="profile", result="stale")
+        schedule_refresh(handle, cached_fields(cached))
+        return for_request(cached, handle, fields)
+
+    metrics.incr("cache", cache="profile", result="miss")
+
+    wanted = tuple(dict.fromkeys(cached_fields(cached) + fields))
+    result, negative = fetch_player_stats_shared(handle, INTERACTIVE, wanted)
+    store_profile(handle, result, negative)
+    return for_request(result, handle, fields)
+
+
+async def fetch_player_stats_async(
+    sessions: dict,
+    handle: str,
+    priority: int = INTERACTIVE,
+    fields: tuple[str, ...] = PROFILE_EXTRA_FIELDS,
+):
+    """``fetch_player_stats`` over the batch's shared AsyncSessions."""
+    url = f"{API_BASE_URL}{urllib.parse.quote(handle)}"
+    host = host_of(url)
 
-            return {
-                "riot_id": handle,
-                "current_rank": rank,
-                "kd": f"{(stats.get('kDRatio') or {}).get('value', 0):.2f}",
-                "wr": f"{(stats.get('matchesWinPct') or {}).get('value', 0):.1f}%",
-                "wins": int((stats.get("matchesWon") or {}).get("value", 0)),
-                "games_played": int((stats.get("matchesPlayed") or {}).get("value", 0)),
-                "tracker_url": f"https://tracker.gg/valorant/profile/riot/{urllib.parse.quote(handle)}/overview",
-            }
+    for attempt, browser_config, headers in profile_attempts(handle):
+        with metrics.span("rate_wait"):
+            await scheduler.acquire_async(host, priority)
+        started = time.monotonic()
 
+        try:
+            with metrics.span(
+                "profile_attempt", impersonate=browser_config["impersonate"]
+            ):
+                resp = await sessions[browser_config["impersonate"]].get(
+                    url,
+                    headers=headers,
+                    timeout=browser_config["timeout"],
+                )
+            outcome = profile_response(
+                handle, attempt, browser_config, host, started, resp, fields
+            )
         except Exception as e:
-            print(f"[STATS] Attempt {attempt} exception: {str(e)}", file=sys.stderr)
-            if attempt < len(BROWSER_CONFIGS):
-                time.sleep(1)
-                continue
-            return {"error": "Service temporarily unavailable"}
+            outcome = profile_error(attempt, browser_config, started, e)
+
+        if outcome is not None:
+            return outcome
+        await asyncio.sleep(backoff_delay(attempt))
+
+    return {"error": "Service temporarily unavailable"}, False
+
+
+async def get_player_stats_many(
+    handles: list[str],
+    concurrency: int = BATCH_CONCURRENCY,
+    priority: int = INTERACTIVE,
+    fields: Optional[list[str]] = None,
+):
+    """Fetch many profiles concurrently, yielding ``(handle, result)`` as each finishes.
+
+    At most ``concurrency`` profiles are in flight at once, and request starts
+    are paced by the shared outbound scheduler. One AsyncSession per
+    impersonation profile is shared by every fetch in the batch. ``fields``
+    works as in ``get_player_stats``.
+    """
+    fields = validate_fields(fields)
+    requests = curl_requests()
+    sessions = {
+        config["impersonate"]: requests.AsyncSession(
+            impersonate=config["impersonate"], max_clients=concurrency
+        )
+        for config in BROWSER_CONFIGS
+    }
+    semaphore = asyncio.Semaphore(concurrency)
+    cache = get_profile_cache()
+    refreshes = set()
+
+    async def fetch_and_store(handle, fetch_priority, fetch_fields):
+        async with semaphore:
+            result, negative = await fetch_player_stats_async(
+                sessions, handle, fetch_priority, fetch_fields
+            )
+        store_profile(handle, result, negative)
+        return result
+
+    async def fetch_shared(handle, fetch_priority, fetch_fields):
+        return await _async_profile_fetches.do(
+            flight_key(handle, fetch_fields),
+            fetch_and_store,
+            handle,
+            fetch_priority,
+            fetch_fields,
+        )
+
+    async def fetch(handle):
+        if not isinstance(handle, str) or not validate_handle(handle):
+            return handle, {"error": "Invalid Riot ID format"}
+
+        cached = None
+        if cache is not None:
+            cached, state = cache.get(handle)
+            if state != MISS and not covers(cached, fields):
+                state = MISS
+            metrics.incr("cache", cache="profile", result=state)
+            if state == FRESH:
+                return handle, for_request(cached, handle, fields)
+            if state == STALE:
+                refresh = asyncio.ensure_future(
+                    fetch_shared(handle, BACKGROUND, cached_fields(cached))
+                )
+                refreshes.add(refresh)
+                return handle, for_request(cached, handle, fields)
 
-    return {"error": "Service temporarily unavailable"}
+        wanted = tuple(dict.fromkeys(cached_fields(cached) + fields))
+        try:
+            result = await fetch_shared(handle, priority, wanted)
+            return handle, for_request(result, handle, fields)
+        except Exception as e:
+            print(f"[STATS] Batch error for {handle}: {e}", file=sys.stderr)
+            return handle, {"error": "Service temporarily unavailable"}
+
+    try:
+        for next_result in asyncio.as_completed([fetch(h) for h in handles]):
+            yield await next_result
+    finally:
+        if refreshes:
+            await asyncio.gather(*refreshes, return_exceptions=True)
+        for session in sessions.values():
+            await session.close()
+
+
+async def print_player_stats_many(
+    handles: list[str],
+    concurrency: int,
+    fmt: str = "ndjson",
+    fields: Optional[list[str]] = None,
+):
+    writer = open_writer(fmt)
+    try:
+        async for handle, result in get_player_stats_many(
+            handles, concurrency, fields=fields
+        ):
+            writer.write({"handle": handle, "result": result})
+    finally:
+        writer.close()
+    print(
+        f"[STATS] Fingerprint stats: {json.dumps(get_fingerprint_stats())}",
+        file=sys.stderr,
+    )
+
+
+def snapshot(region: str, act_id: str, items: list[dict]) -> dict:
+    record_snapshot(region, act_id, items)
+    return {"items": items}
 
 
-def get_leaderboard(region: str, page: int, act_id: str):
+def get_leaderboard(
+    region: str, page: int, act_id: str = ACT_ID, priority: int = INTERACTIVE
+):
     validated_region = validate_region(region)
     validated_act_id = validate_act_id(act_id)
 
     if not isinstance(page, int) or page < 1 or page > 10000:
         return {"error": "Invalid page number"}
 
-    base_url = "https://tracker.gg/valorant/leaderboards/ranked/all/default"
-    url = f"{base_url}?platform=pc&region={validated_region}&act={validated_act_id}&page={page}"
+    url = f"{LEADERBOARD_URL}?platform=pc&region={validated_region}&act={validated_act_id}&page={page}"
 
-    if not url.startswith("https://tracker.gg/valorant/leaderboards/"):
+    if not url.startswith(LEADERBOARD_URL):
         return {"error": "Invalid URL constructed"}
 
     headers = {
@@ -177,73 +691,162 @@ def get_leaderboard(region: str, page: int, act_id: str):
     }
 
     try:
-        resp = requests.get(url, headers=headers, impersonate="chrome120", timeout=15)
+        stream = LeaderboardStream()
+        with metrics.span("rate_wait"):
+            scheduler.acquire(SITE_HOST, priority)
+        with metrics.span("http_fetch"), get_session("chrome120").stream(
+            "GET", url, headers=headers, timeout=15
+        ) as resp:
+            scheduler.record_status(SITE_HOST, resp.status_code)
+            if resp.status_code != 200:
+                print(
+                    f"[STATS] Status: {resp.status_code}, URL: {url}", file=sys.stderr
+                )
+                if resp.status_code in BLOCK_STATUSES:
+                    metrics.incr("challenges", tier="http")
+                return {"error": "Service temporarily unavailable"}
 
-        if resp.status_code != 200:
-            print(f"[STATS] Status: {resp.status_code}, URL: {url}", file=sys.stderr)
-            return {"error": "Service temporarily unavailable"}
+            state_items = None
+            for chunk in resp.iter_content():
+                state_items = stream.feed(chunk)
+                if state_items is not None:
+                    break
 
-        html = resp.text
+        if state_items is None:
+            state_items = stream.close()
+        if state_items is not None:
+            return snapshot(validated_region, validated_act_id, state_items)
 
-        initial_state_start = html.find("window.__INITIAL_STATE__")
-        if initial_state_start != -1:
-            try:
-                json_start = html.find("{", initial_state_start)
-                if json_start != -1:
-                    data, _ = json.JSONDecoder().raw_decode(html[json_start:])
-
-                    leaderboards = data.get("stats", {}).get("standardLeaderboards", [])
-                    if leaderboards:
-                        raw_items = leaderboards[0].get("items", [])
-                        simplified_items = []
-                        for item in raw_items:
-                            rank = item.get("rank")
-                            owner = item.get("owner", {})
-                            metadata = owner.get("metadata", {})
-                            riot_id = (
-                                metadata.get("platformUserHandle")
-                                or metadata.get("platformUserIdentifier")
-                                or owner.get("id")
-                            )
-
-                            if rank and riot_id:
-                                simplified_items.append(
-                                    {"rank": rank, "riotId": riot_id}
-                                )
-                        return {"items": simplified_items}
-            except Exception:
-                pass
-
-        items = []
-        rows = re.split(r"<tr\s*", html)
-
-        current_rank_base = (int(page) - 1) * 100
-
-        for i, row in enumerate(rows[1:]):
-            link_match = re.search(r'/valorant/profile/riot/([^/"]+)/overview', row)
-            if link_match:
-                riot_id = urllib.parse.unquote(link_match.group(1))
-
-                rank = 0
-                rank_match = re.search(r"<td[^>]*>.*?(\d+).*?</td>", row, re.DOTALL)
-                if rank_match:
-                    rank = int(rank_match.group(1))
-                else:
-                    rank = current_rank_base + i + 1
-
-                items.append({"rank": rank, "riotId": riot_id})
+        html = stream.text()
+
+        try:
+            state_items = extract_leaderboard_items(html)
+            if state_items is not None:
+                return snapshot(validated_region, validated_act_id, state_items)
+        except Exception:
+            pass
+
+        with metrics.span("rows_fallback", tier="http"):
+            items = parse_leaderboard_rows(html, page)
 
         if len(items) > 0:
-            return {"items": items}
+            return snapshot(validated_region, validated_act_id, items)
 
         return {"error": "Service temporarily unavailable"}
 
     except Exception as e:
         print(f"[STATS] Error: {str(e)}", file=sys.stderr)
+        metrics.incr("errors", tier="http")
         return {"error": "Service temporarily unavailable"}
 
 
-if __name__ == "__main__":
+def write_line(response: dict):
+    sys.stdout.write(json.dumps(response) + "\n")
+    sys.stdout.flush()
+
+
+def serve(workers: int = STATS_WORKER_THREADS):
+    """Answer newline-delimited JSON profile requests on stdin.
+
+    A request line looks like ``{"id": 1, "handles": ["name#tag", ...]}``. Each
+    handle is answered as soon as it finishes with
+    ``{"id": 1, "handle": "name#tag", "result": {...}}``, followed by
+    ``{"id": 1, "done": true}`` once the whole batch is complete. Add
+    ``"fields": ["headshotsPercentage", ...]`` to choose the extra stats
+    returned under ``"stats"`` instead of ``STATS_PROFILE_EXTRA_FIELDS``.
+    ``{"id": 2, "op": "fingerprints"}`` returns per-profile success rates and
+    latencies. ``{"id": 3, "op": "metrics"}`` returns counters and per-phase
+    timings, as Prometheus text under ``"text"`` with ``"format": "prometheus"``.
+    """
+    output_lock = threading.Lock()
+
+    def write_response(response: dict):
+        with output_lock:
+            write_line(response)
+
+    def serve_handle(request_id, handle, fields, batch: dict):
+        try:
+            if isinstance(handle, str) and validate_handle(handle):
+                result = get_player_stats(handle, fields)
+            else:
+                result = {"error": "Invalid Riot ID format"}
+        except Exception as e:
+            print(f"[STATS] Worker error for {handle}: {e}", file=sys.stderr)
+            result = {"error": "Service temporarily unavailable"}
+
+        with output_lock:
+            write_line({"id": request_id, "handle": handle, "result": result})
+            batch["remaining"] -= 1
+            if batch["remaining"] == 0:
+                write_line({"id": request_id, "done": True})
+
+    metrics.set_labels(scraper="stats")
+    print(f"[STATS] Serving requests on stdin with {workers} workers", file=sys.stderr)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be an object")
+            except ValueError as e:
+                print(f"[STATS] Malformed request: {e}", file=sys.stderr)
+                write_response(
+                    {"id": None, "result": {"error": "Invalid request"}, "done": True}
+                )
+                continue
+
+            request_id = request.get("id")
+            if request.get("op") == "fingerprints":
+                write_response(
+                    {"id": request_id, "result": get_fingerprint_stats(), "done": True}
+                )
+                continue
+
+            if request.get("op") == "metrics":
+                write_response(
+                    {
+                        "id": request_id,
+                        "result": metrics.render(request.get("format")),
+                        "done": True,
+                    }
+                )
+                continue
+
+            handles = request.get("handles")
+            try:
+                fields = validate_fields(request.get("fields"))
+            except ValueError as e:
+                print(f"[STATS] Invalid fields: {e}", file=sys.stderr)
+                handles = None
+            if not isinstance(handles, list) or not handles:
+                write_response(
+                    {
+                        "id": request_id,
+                        "result": {"error": "Invalid request"},
+                        "done": True,
+                    }
+                )
+                continue
+
+            batch = {"remaining": len(handles)}
+            for handle in handles:
+                executor.submit(serve_handle, request_id, handle, fields, batch)
+
+
+def add_fields_argument(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--fields",
+        type=lambda text: [field.strip() for field in text.split(",") if field.strip()],
+        help='Comma-separated extra stats to return under "stats" '
+        "(default: STATS_PROFILE_EXTRA_FIELDS)",
+    )
+
+
+def main(argv: Optional[list[str]] = None):
     parser = argparse.ArgumentParser(description="Valorant player stats scraper")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -251,31 +854,89 @@ if __name__ == "__main__":
     profile_parser.add_argument(
         "handle", type=str, help="Player Riot ID (e.g., name#tag)"
     )
+    add_fields_argument(profile_parser)
+    add_format_argument(profile_parser, "json")
+
+    batch_parser = subparsers.add_parser(
+        "profile-batch", help="Get stats for many players concurrently"
+    )
+    batch_parser.add_argument(
+        "handles", type=str, nargs="+", help="Player Riot IDs (e.g., name#tag)"
+    )
+    batch_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BATCH_CONCURRENCY,
+        help="Maximum number of profiles fetched at once",
+    )
+    batch_parser.add_argument(
+        "--rate",
+        type=float,
+        help="Requests per second to the profile API (0 disables the limit)",
+    )
+    add_fields_argument(batch_parser)
+    add_format_argument(batch_parser, "ndjson")
 
     leaderboard_parser = subparsers.add_parser(
         "leaderboard", help="Get leaderboard data"
     )
     leaderboard_parser.add_argument("region", type=str, help="Server region")
     leaderboard_parser.add_argument("page", type=int, help="Page number")
-    leaderboard_parser.add_argument("act_id", type=str, help="Valorant Act ID")
+    leaderboard_parser.add_argument(
+        "act_id", type=str, nargs="?", default=ACT_ID, help="Valorant Act ID"
+    )
+    add_format_argument(leaderboard_parser, "json")
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Serve newline-delimited JSON profile requests on stdin/stdout"
+    )
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=STATS_WORKER_THREADS,
+        help="Number of concurrent profile fetches",
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     try:
         if args.command == "profile":
             if not validate_handle(args.handle):
                 print(f"[STATS] Invalid Riot ID format: {args.handle}", file=sys.stderr)
                 sys.exit(1)
-            result = get_player_stats(args.handle)
-            print(json.dumps(result))
+            writer = open_writer(args.format, single=True)
+            result = get_player_stats(args.handle, args.fields)
+            writer.write({"handle": args.handle, "result": result})
+            writer.close()
+
+        elif args.command == "profile-batch":
+            if args.rate is not None:
+                scheduler.configure(API_HOST, args.rate)
+            asyncio.run(
+                print_player_stats_many(
+                    args.handles, max(1, args.concurrency), args.format, args.fields
+                )
+            )
 
         elif args.command == "leaderboard":
             if args.page < 1 or args.page > 10000:
                 print(f"[STATS] Page number out of range: {args.page}", file=sys.stderr)
                 sys.exit(1)
 
+            writer = open_writer(args.format, single=True)
             result = get_leaderboard(args.region, args.page, args.act_id)
-            print(json.dumps(result))
+            writer.write(
+                {
+                    "region": validate_region(args.region),
+                    "act_id": args.act_id,
+                    "page": args.page,
+                    "result": result,
+                }
+            )
+            writer.close()
+
+        elif args.command == "serve":
+            serve(max(1, args.workers))
 
     except ValueError as e:
         print(f"[STATS] Validation error: {str(e)}", file=sys.stderr)
@@ -283,3 +944,7 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"[STATS] Internal error: {str(e)}", file=sys.stderr)
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import re
+import json
+import urllib.parse
+from typing import Iterable, Iterator, Optional
+
+STATE_MARKER = "window.__INITIAL_STATE__"
+LEADERBOARDS_PATTERN = re.compile(r'"standardLeaderboards"\s*:\s*\[')
+LEADERBOARDS_BYTES_PATTERN = re.compile(rb'"standardLeaderboards"\s*:\s*\[')
+
+ROW_SPLIT_PATTERN = re.compile(r"<tr\s*")
+ROW_PROFILE_PATTERN = re.compile(r'/valorant/profile/riot/([^/"]+)/overview')
+ROW_RANK_PATTERN = re.compile(r"<td[^>]*>.*?(\d+).*?</td>", re.DOTALL)
+TITLE_PATTERN = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+CHALLENGE_TITLES = ("Just a moment", "Attention Required")
+
+ROOT_DATA_PATTERN = re.compile(r'\s*\{\s*"data"\s*:\s*\{')
+SEGMENTS_PATTERN = re.compile(r'"segments"\s*:\s*\[')
+STRING_PATTERN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+NON_STRUCTURAL_BYTES = bytes(b for b in range(256) if b not in b'"\\[]{}')
+NON_BRACKET_BYTES = bytes(b for b in range(256) if b not in b"[]{}")
+SEASON_TYPE_PATTERN = re.compile(r'"type"\s*:\s*"season"')
+# Stats read from the competitive segment of a profile response.
+PROFILE_STATS = (
+    "rank",
+    "tier",
+    "kDRatio",
+    "matchesWinPct",
+    "matchesWon",
+    "matchesPlayed",
+)
+# How many enclosing objects to try when looking for the start of a segment
+# whose "type" key isn't its first.
+SEGMENT_BACKTRACK = 8
+
+# The key pattern can straddle two chunks, so each scan restarts this far back.
+SCAN_OVERLAP = 64
+DECODE_RETRY_BYTES = 64 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+def simplify_items(raw_items: Iterable[dict]) -> Iterator[dict]:
+    """Reduce raw leaderboard entries to ``{rank, riotId}``."""
+    for item in raw_items:
+        rank = item.get("rank")
+        owner = item.get("owner", {})
+        metadata = owner.get("metadata", {})
+        riot_id = (
+            metadata.get("platformUserHandle")
+            or metadata.get("platformUserIdentifier")
+            or owner.get("id")
+        )
+        if rank and riot_id:
+            yield {"rank": rank, "riotId": riot_id}
+
+
+def first_leaderboard_items(leaderboards) -> Optional[list[dict]]:
+    if not isinstance(leaderboards, list) or not leaderboards:
+        return None
+    return list(simplify_items(leaderboards[0].get("items", [])))
+
+
+def extract_leaderboard_items(html: str) -> Optional[list[dict]]:
+    """Pull leaderboard items out of a page's ``__INITIAL_STATE__``.
+
+    Only the ``standardLeaderboards`` array is decoded, straight out of the
+    page text without slicing it. If that key can't be found the whole state
+    object is decoded as before.
+    """
+    state_at = html.find(STATE_MARKER)
+    if state_at == -1:
+        return None
+
+    match = LEADERBOARDS_PATTERN.search(html, state_at)
+    if match:
+        try:
+            leaderboards, _ = _decoder.raw_decode(html, match.end() - 1)
+            return first_leaderboard_items(leaderboards)
+        except ValueError:
+            pass
+
+    json_start = html.find("{", state_at)
+    if json_start == -1:
+        return None
+
+    data, _ = _decoder.raw_decode(html, json_start)
+    return first_leaderboard_items(data.get("stats", {}).get("standardLeaderboards"))
+
+
+def parse_leaderboard_rows(html: str, page: int) -> list[dict]:
+    """Regex fallback: read ``{rank, riotId}`` from the leaderboard table rows."""
+    items = []
+    rows = ROW_SPLIT_PATTERN.split(html)
+
+    current_rank_base = (int(page) - 1) * 100
+
+    for i, row in enumerate(rows[1:]):
+        link_match = ROW_PROFILE_PATTERN.search(row)
+        if link_match:
+            riot_id = urllib.parse.unquote(link_match.group(1))
+
+            rank_match = ROW_RANK_PATTERN.search(row)
+            if rank_match:
+                rank = int(rank_match.group(1))
+            else:
+                rank = current_rank_base + i + 1
+
+            items.append({"rank": rank, "riotId": riot_id})
+
+    return items
+
+
+def preceding_char(text: str, at: int) -> str:
+    """The last non-whitespace character before ``at``."""
+    at -= 1
+    while at >= 0 and text[at] in " \t\r\n":
+        at -= 1
+    return text[at] if at >= 0 else ""
+
+
+def cancel_pairs(brackets: bytes) -> bytes:
+    """Drop matched ``{}`` and ``[]`` pairs until only unmatched ones remain."""
+    while True:
+        reduced = brackets.replace(b"{}", b"").replace(b"[]", b"")
+        if reduced == brackets:
+            return reduced
+        brackets = reduced
+
+
+def unmatched_brackets(text: str, start: int, end: int) -> Optional[bytes]:
+    """The brackets left open or closed between two points, outside strings.
+
+    None if the span starts or ends inside a string.
+    """
+    span = text[start:end]
+    # Fast path: keep only quotes, backslashes and brackets. When no string
+    # holds a bracket or an escaped quote, every string shrinks to ``""``.
+    structure = span.encode("utf-8").translate(None, NON_STRUCTURAL_BYTES)
+    structure = structure.replace(b"\\\\", b"")
+    if b'\\"' not in structure:
+        structure = structure.replace(b"\\", b"").replace(b'""', b"")
+        if b'"' not in structure:
+            return cancel_pairs(structure)
+
+    outside = STRING_PATTERN.sub("", span)
+    if '"' in outside:
+        return None
+    return cancel_pairs(outside.encode("utf-8").translate(None, NON_BRACKET_BYTES))
+
+
+def find_season_segment(text: str) -> Optional[dict]:
+    """Decode just the first ``type: season`` element of ``data.segments``.
+
+    Other segments are skipped over as text rather than decoded. A candidate
+    only counts once the brackets between it and the start of
+    ``data.segments`` show it is a direct element of that array, not an
+    object nested inside another segment. Returns None when no such segment
+    can be located this way.
+    """
+    root = ROOT_DATA_PATTERN.match(text)
+    if not root:
+        return None
+
+    for segments in SEGMENTS_PATTERN.finditer(text, root.end()):
+        if unmatched_brackets(text, root.end(), segments.start()) == b"":
+            break
+    else:
+        return None
+
+    # Brackets still open between the array's start and ``checked``; a
+    # direct element starts where there are none.
+    checked, opened = segments.end(), b""
+    for match in SEASON_TYPE_PATTERN.finditer(text, segments.end()):
+        start = match.start()
+        for _ in range(SEGMENT_BACKTRACK):
+            start = text.rfind("{", checked, start)
+            if start == -1:
+                break
+            # Segments are array elements; nested objects follow a ':'.
+            if preceding_char(text, start) not in ("[", ","):
+                continue
+            step = unmatched_brackets(text, checked, start)
+            if step is None or cancel_pairs(opened + step) != b"":
+                continue
+            try:
+                segment, end = _decoder.raw_decode(text, start)
+            except ValueError:
+                return None
+            if (
+                end > match.start()
+                and isinstance(segment, dict)
+                and segment.get("type") == "season"
+                and isinstance(segment.get("stats"), dict)
+            ):
+                return segment
+            # A season-typed object nested inside some other segment.
+            break
+
+        step = unmatched_brackets(text, checked, match.start())
+        if step is None:
+            continue
+        checked, opened = match.start(), cancel_pairs(opened + step)
+        # Either past the end of the segments array, or the type key of a
+        # direct segment whose start wasn't found.
+        if opened == b"{" or b"]" in opened or b"}" in opened:
+            return None
+    return None
+
+
+def extract_profile_stats(
+    text: str, fields: Iterable[str] = PROFILE_STATS
+) -> Optional[dict]:
+    """The competitive segment's stats from a profile response, limited to ``fields``.
+
+    Only that segment is decoded when it can be found in the text; otherwise
+    the whole response is decoded as before. Returns None when the profile
+    has no competitive segment.
+    """
+    segment = find_season_segment(text)
+    if segment is None:
+        data = json.loads(text).get("data") or {}
+        segments = data.get("segments") or []
+        segment = next((s for s in segments if s.get("type") == "season"), None)
+        if not segment:
+            segment = next(
+                (s for s in segments if (s.get("stats") or {}).get("rank")), None
+            )
+        if not segment:
+            return None
+
+    stats = segment.get("stats") or {}
+    return {name: stats[name] for name in fields if name in stats}
+
+
+def is_challenge_page(html: str) -> bool:
+    """True if the page is a Cloudflare interstitial rather than real content."""
+    match = TITLE_PATTERN.search(html)
+    title = match.group(1) if match else ""
+    return any(marker in title for marker in CHALLENGE_TITLES)
+
+
+class LeaderboardStream:
+    """Incrementally finds and decodes leaderboard items from a streamed page.
+
+    Feed raw response chunks in order. ``feed`` returns the items as soon as
+    the ``standardLeaderboards`` array has arrived in full, so the caller can
+    stop reading the rest of the document. If the stream ends without a
+    result, ``close`` makes a last attempt and ``text`` holds the whole page
+    for other fallbacks.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self._state_at = -1
+        self._array_at = -1
+        self._scanned = 0
+        self._attempted = 0
+
+    def feed(self, chunk: bytes) -> Optional[list[dict]]:
+        self.buffer += chunk
+
+        if self._array_at == -1 and not self._locate():
+            return None
+
+        if len(self.buffer) - self._attempted < DECODE_RETRY_BYTES:
+            return None
+        return self._decode()
+
+    def close(self) -> Optional[list[dict]]:
+        if self._array_at == -1 and not self._locate():
+            return None
+        return self._decode()
+
+    def text(self) -> str:
+        return self.buffer.decode("utf-8", errors="replace")
+
+    def _locate(self) -> bool:
+        scan_from = max(0, self._scanned - SCAN_OVERLAP)
+        self._scanned = len(self.buffer)
+
+        if self._state_at == -1:
+            self._state_at = self.buffer.find(STATE_MARKER.encode("ascii"), scan_from)
+            if self._state_at == -1:
+                return False
+            scan_from = self._state_at
+
+        match = LEADERBOARDS_BYTES_PATTERN.search(
+            self.buffer, max(scan_from, self._state_at)
+        )
+        if not match:
+            return False
+
+        self._array_at = match.end() - 1
+        return True
+
+    def _decode(self) -> Optional[list[dict]]:
+        self._attempted = len(self.buffer)
+        try:
+            tail = self.buffer[self._array_at :].decode("utf-8", errors="replace")
+            leaderboards, _ = _decoder.raw_decode(tail)
+        except ValueError:
+            return None
+        return first_leaderboard_items(leaderboards)
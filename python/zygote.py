@@ -0,0 +1,291 @@
+import os
+import sys
+import json
+import stat
+import signal
+import socket
+import importlib
+import selectors
+
+# Kept to the standard library: the client side of this module runs on every
+# request, so it must start faster than the scrapers it stands in for.
+
+# Anyone who can connect can run scrapers as this user, so the default lives
+# in a directory only this user can enter.
+ZYGOTE_SOCKET = os.environ.get("SCRAPER_ZYGOTE_SOCKET") or os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or f"/tmp/getrank-scraper-{os.getuid()}",
+    "getrank-scraper.sock",
+)
+SCRIPTS = {"stats": "stats_scraper", "leaderboard": "leaderboard_scraper"}
+# Imported once in the zygote so forked children start with them loaded.
+PRELOAD_MODULES = ("curl_cffi.requests", "playwright.async_api")
+MESSAGE_LIMIT = 64 * 1024
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def preload():
+    for script in SCRIPTS.values():
+        importlib.import_module(script)
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"[ZYGOTE] Skipping preload of {name}: {e}", file=sys.stderr)
+
+
+def prepare_socket_path(path: str):
+    """Check that no other user controls ``path`` or its directory.
+
+    The directory is created private if missing. It must belong to this
+    user or root, and be sticky if others can write to it. A leftover socket
+    of ours is removed; anything else at ``path`` is refused with
+    RuntimeError rather than unlinked.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid not in (0, os.getuid()):
+        raise RuntimeError(f"{directory} is not a directory owned by this user")
+    if info.st_mode & 0o022 and not info.st_mode & stat.S_ISVTX:
+        raise RuntimeError(f"{directory} is writable by other users")
+
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise RuntimeError(f"{path} exists and is not a socket owned by this user")
+    os.unlink(path)
+
+
+def send_line(conn: socket.socket, message: dict):
+    try:
+        conn.sendall((json.dumps(message) + "\n").encode("utf-8"))
+    except OSError:
+        pass
+
+
+def run_child(request: dict, fds: list[int]) -> int:
+    """Body of a forked child: adopt the client's stdio, then run the CLI."""
+    for target, fd in enumerate(fds[:3]):
+        os.dup2(fd, target)
+    for fd in fds:
+        os.close(fd)
+
+    sys.stdin = open(0, closefd=False)
+    sys.stdout = open(1, "w", closefd=False)
+    sys.stderr = open(2, "w", closefd=False)
+    os.chdir(request.get("cwd") or "/")
+
+    script = SCRIPTS[request["script"]]
+    argv = [str(arg) for arg in request.get("argv", [])]
+    sys.argv = [os.path.join(SCRIPT_DIR, f"{script}.py")] + argv
+
+    code = 0
+    try:
+        importlib.import_module(script).main(argv)
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            code = e.code
+        elif e.code is not None:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException as e:
+        print(f"[ZYGOTE] Child failed: {e}", file=sys.stderr)
+        code = 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+    return code
+
+
+class Zygote:
+    """A pre-imported parent that forks one ready-to-run child per request.
+
+    Clients connect over a Unix socket, send ``{"script", "argv", "cwd"}``
+    along with their stdin/stdout/stderr descriptors, and get back
+    ``{"pid"}`` once the child is forked and ``{"exit"}`` when it finishes.
+    Children inherit the zygote's environment and module state, not the
+    client's environment.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.children: dict[int, socket.socket] = {}
+        self.selector = selectors.DefaultSelector()
+        self.wakeup: tuple[int, int] = (-1, -1)
+
+    def run(self):
+        preload()
+
+        prepare_socket_path(self.path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Created 0600 rather than chmodded after bind, so no other user can
+        # connect in between.
+        umask = os.umask(0o177)
+        try:
+            listener.bind(self.path)
+        finally:
+            os.umask(umask)
+        listener.listen(64)
+
+        wakeup_r, wakeup_w = self.wakeup = os.pipe()
+        os.set_blocking(wakeup_w, False)
+        signal.set_wakeup_fd(wakeup_w)
+        signal.signal(signal.SIGCHLD, lambda *_: None)
+
+        self.selector.register(listener, selectors.EVENT_READ, "accept")
+        self.selector.register(wakeup_r, selectors.EVENT_READ, "reap")
+        print(f"[ZYGOTE] Forking scrapers on {self.path}", file=sys.stderr)
+
+        try:
+            while True:
+                for key, _ in self.selector.select():
+                    if key.data == "accept":
+                        self.accept(listener)
+                    else:
+                        os.read(wakeup_r, 4096)
+                        self.reap()
+        finally:
+            listener.close()
+            os.unlink(self.path)
+
+    def accept(self, listener: socket.socket):
+        conn, _ = listener.accept()
+        try:
+            data, fds, _, _ = socket.recv_fds(conn, MESSAGE_LIMIT, 3)
+            request = json.loads(data)
+            if request.get("script") not in SCRIPTS or len(fds) != 3:
+                raise ValueError("Expected a known script and three descriptors")
+        except (OSError, ValueError) as e:
+            print(f"[ZYGOTE] Bad request: {e}", file=sys.stderr)
+            send_line(conn, {"error": "Invalid request"})
+            conn.close()
+            return
+
+        pid = os.fork()
+        if pid == 0:
+            self.selector.close()
+            signal.set_wakeup_fd(-1)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            for fd in self.wakeup:
+                os.close(fd)
+            conn.close()
+            listener.close()
+            os._exit(run_child(request, fds))
+
+        for fd in fds:
+            os.close(fd)
+        self.children[pid] = conn
+        send_line(conn, {"pid": pid})
+
+    def reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            conn = self.children.pop(pid, None)
+            if conn is not None:
+                send_line(conn, {"exit": os.waitstatus_to_exitcode(status)})
+                conn.close()
+
+
+def run_direct(script: str, argv: list[str]):
+    path = os.path.join(SCRIPT_DIR, f"{SCRIPTS[script]}.py")
+    os.execv(sys.executable, [sys.executable, path] + argv)
+
+
+def run(script: str, argv: list[str], path: str = ZYGOTE_SOCKET) -> int:
+    """Run a scraper CLI through the zygote, or directly if none is listening.
+
+    A socket owned by another user is never used: it would be handed this
+    process's stdio.
+    """
+    try:
+        owner = os.lstat(path).st_uid
+    except OSError:
+        owner = None
+    if owner != os.getuid():
+        if owner is not None:
+            print(f"[ZYGOTE] Ignoring {path}: owned by another user", file=sys.stderr)
+        run_direct(script, argv)
+
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+    except OSError:
+        conn.close()
+        run_direct(script, argv)
+
+    request = {"script": script, "argv": argv, "cwd": os.getcwd()}
+    socket.send_fds(conn, [json.dumps(request).encode("utf-8")], [0, 1, 2])
+
+    child = None
+
+    def forward(signum, _frame):
+        if child is not None:
+            os.kill(child, signum)
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, forward)
+
+    for line in conn.makefile("r", encoding="utf-8"):
+        message = json.loads(line)
+        if "pid" in message:
+            child = message["pid"]
+        elif "exit" in message:
+            code = message["exit"]
+            # A child killed by a signal reports -signum; mirror the shell.
+            return 128 - code if code < 0 else code
+        elif "error" in message:
+            print(f"[ZYGOTE] {message['error']}", file=sys.stderr)
+            return 1
+
+    print("[ZYGOTE] Lost the zygote before the child finished", file=sys.stderr)
+    return 1
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    usage = (
+        "usage: zygote.py serve [--socket PATH]\n"
+        "       zygote.py {stats,leaderboard} ARGS..."
+    )
+
+    # Hand-rolled rather than argparse so the client path stays as light as
+    # possible and every argument after the script name reaches the scraper.
+    if argv[:1] == ["serve"]:
+        path = ZYGOTE_SOCKET
+        if argv[1:2] == ["--socket"] and len(argv) == 3:
+            path = argv[2]
+        elif len(argv) != 1:
+            print(usage, file=sys.stderr)
+            sys.exit(2)
+        try:
+            Zygote(path).run()
+        except RuntimeError as e:
+            print(f"[ZYGOTE] Refusing to start: {e}", file=sys.stderr)
+            sys.exit(1)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if not argv or argv[0] not in SCRIPTS:
+        print(usage, file=sys.stderr)
+        sys.exit(2)
+    sys.exit(run(argv[0], argv[1:]))
+
+
+if __name__ == "__main__":
+    main()
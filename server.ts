@@ -1,33 +1,8 @@
 import { serve } from "bun";
 import { handler as lookupHandler } from "./api/leaderboard-lookup";
+import { getScraperMetrics, warmupScraperWorkers } from "./src/utils/scraper";
 import * as path from "path";
 
-async function warmupBrowser() {
-  console.log("[SERVER] Warming up Playwright browser...");
-  try {
-    const proc = Bun.spawn(["python3", "-c", `
-import asyncio
-import sys
-sys.path.insert(0, 'python')
-from leaderboard_scraper import warmup
-asyncio.run(warmup())
-`], {
-      cwd: process.cwd(),
-      stderr: "inherit"
-    });
-
-    const exitCode = await proc.exited;
-
-    if (exitCode !== 0) {
-      console.warn("[SERVER] Browser warmup failed, will initialize on first request");
-    } else {
-      console.log("[SERVER] Browser warmup completed");
-    }
-  } catch (e) {
-    console.warn("[SERVER] Browser warmup failed, will initialize on first request:", e);
-  }
-}
-
 const SECURITY_HEADERS = {
   "Content-Security-Policy": "default-src 'self'; script-src 'self' 'unsafe-inline' 'unsafe-eval'; style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; font-src 'self' https://fonts.gstatic.com; img-src 'self' data:; connect-src 'self' https://tracker.gg; object-src 'none'; base-uri 'self'; frame-ancestors 'none'; form-action 'self'",
   "X-Frame-Options": "DENY",
@@ -37,6 +12,8 @@ const SECURITY_HEADERS = {
   "Permissions-Policy": "geolocation=(), microphone=(), camera=(), payment=()"
 };
 
+const LOOPBACK_ADDRESSES = new Set(["127.0.0.1", "::1", "::ffff:127.0.0.1"]);
+
 function addHeaders(response: Response): Response {
   for (const [key, value] of Object.entries(SECURITY_HEADERS)) {
     response.headers.set(key, value);
@@ -68,6 +45,12 @@ const server = serve({
       }
     }
 
+    if (pathname === "/metrics" && LOOPBACK_ADDRESSES.has(clientIP)) {
+      return new Response(await getScraperMetrics(), {
+        headers: { "Content-Type": "text/plain; version=0.0.4" },
+      });
+    }
+
     const distDir = path.resolve("dist");
 
     let requestedPath = path.join(distDir, url.pathname === "/" ? "index.html" : url.pathname);
@@ -92,4 +75,5 @@ const server = serve({
 });
 
 console.log("Server running on http://localhost:3000");
-warmupBrowser();
+console.log("[SERVER] Starting scraper workers...");
+warmupScraperWorkers();
@@ -12,6 +12,7 @@ export interface CacheStore {
   get<T>(key: string): Promise<T | null>;
   set<T>(key: string, value: T): Promise<void>;
   has(key: string): Promise<boolean>;
+  delete(key: string): Promise<void>;
   destroy(): void;
   getStats?(): Record<string, unknown>;
 }
@@ -59,6 +60,10 @@ export class InMemoryCache implements CacheStore {
     return (await this.get<unknown>(key)) !== null;
   }
 
+  async delete(key: string): Promise<void> {
+    this.cache.delete(key);
+  }
+
   cleanup(): void {
     const now = Date.now();
     for (const [key, entry] of this.cache.entries()) {
@@ -148,6 +153,15 @@ export class RedisCache implements CacheStore {
     }
   }
 
+  async delete(key: string): Promise<void> {
+    try {
+      // @ts-expect-error - ioredis package type definitions
+      await this.client.del(key);
+    } catch (e) {
+      console.error(`Redis delete failed for ${key}:`, e);
+    }
+  }
+
   destroy(): void {
     // @ts-expect-error - ioredis package type definitions
     this.client.disconnect();
@@ -0,0 +1,148 @@
+import type { Subprocess } from 'bun';
+
+export interface WorkerMessage {
+  id?: number | null;
+  done?: boolean;
+  [key: string]: unknown;
+}
+
+interface PendingRequest {
+  messages: WorkerMessage[];
+  resolve: (messages: WorkerMessage[]) => void;
+  reject: (error: Error) => void;
+  timer: ReturnType<typeof setTimeout>;
+}
+
+/**
+ * Long-lived Python process speaking newline-delimited JSON over stdin/stdout.
+ * Every request gets an id; the worker answers with one or more lines carrying
+ * that id, the last of which has `done: true`. Lines with an `event` field and
+ * no id are unsolicited notifications and go to the `onEvent` handlers.
+ */
+export class PythonWorker {
+  private name: string;
+  private args: string[];
+  private timeoutMs: number;
+  private proc: Subprocess<'pipe', 'pipe', 'inherit'> | null = null;
+  private nextId = 1;
+  private pending = new Map<number, PendingRequest>();
+  private eventHandlers: Array<(message: WorkerMessage) => void> = [];
+
+  constructor(name: string, args: string[], timeoutMs: number = 60000) {
+    this.name = name;
+    this.args = args;
+    this.timeoutMs = timeoutMs;
+  }
+
+  start(): void {
+    if (this.proc) return;
+
+    const proc = Bun.spawn(["python3", ...this.args], {
+      cwd: process.cwd(),
+      stdin: "pipe",
+      stdout: "pipe",
+      stderr: "inherit"
+    });
+    this.proc = proc;
+
+    this.readLines(proc).catch((e) => {
+      console.error(`[${this.name}] Worker output failed:`, e);
+    });
+
+    proc.exited.then((exitCode) => {
+      if (this.proc === proc) {
+        this.proc = null;
+      }
+      console.warn(`[${this.name}] Worker exited with code ${exitCode}`);
+      this.rejectAll(new Error(`Worker exited with code ${exitCode}`));
+    });
+  }
+
+  request(payload: Record<string, unknown>): Promise<WorkerMessage[]> {
+    this.start();
+    const proc = this.proc!;
+    const id = this.nextId++;
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`Worker request ${id} timed out`));
+      }, this.timeoutMs);
+
+      this.pending.set(id, { messages: [], resolve, reject, timer });
+
+      try {
+        proc.stdin.write(JSON.stringify({ ...payload, id }) + "\n");
+        proc.stdin.flush();
+      } catch (e) {
+        clearTimeout(timer);
+        this.pending.delete(id);
+        reject(e instanceof Error ? e : new Error(String(e)));
+      }
+    });
+  }
+
+  onEvent(handler: (message: WorkerMessage) => void): void {
+    this.eventHandlers.push(handler);
+  }
+
+  stop(): void {
+    this.proc?.stdin.end();
+  }
+
+  private async readLines(proc: Subprocess<'pipe', 'pipe', 'inherit'>): Promise<void> {
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    for await (const chunk of proc.stdout) {
+      buffer += decoder.decode(chunk, { stream: true });
+
+      let newline = buffer.indexOf("\n");
+      while (newline !== -1) {
+        const line = buffer.slice(0, newline).trim();
+        buffer = buffer.slice(newline + 1);
+        if (line) {
+          this.dispatch(line);
+        }
+        newline = buffer.indexOf("\n");
+      }
+    }
+  }
+
+  private dispatch(line: string): void {
+    let message: WorkerMessage;
+    try {
+      message = JSON.parse(line);
+    } catch {
+      console.warn(`[${this.name}] Ignoring malformed worker output`);
+      return;
+    }
+
+    if (message.id == null) {
+      if (message.event) {
+        for (const handler of this.eventHandlers) {
+          handler(message);
+        }
+      }
+      return;
+    }
+
+    const entry = this.pending.get(message.id);
+    if (!entry) return;
+
+    entry.messages.push(message);
+    if (message.done) {
+      clearTimeout(entry.timer);
+      this.pending.delete(message.id);
+      entry.resolve(entry.messages);
+    }
+  }
+
+  private rejectAll(error: Error): void {
+    for (const entry of this.pending.values()) {
+      clearTimeout(entry.timer);
+      entry.reject(error);
+    }
+    this.pending.clear();
+  }
+}
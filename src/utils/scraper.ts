@@ -1,7 +1,75 @@
 import type { PlayerStats, Region } from '../types/index.js';
+import { PythonWorker } from './python-worker.js';
+import { playerCache } from './cache.js';
 
 const ACT_ID = process.env.VALORANT_ACT_ID || '4c4b8cff-43eb-13d3-8f14-96b783c90cd2';
 
+const leaderboardWorker = new PythonWorker('LEADERBOARD', ['python/leaderboard_scraper.py', 'serve']);
+const statsWorker = new PythonWorker('STATS', ['python/stats_scraper.py', 'serve']);
+
+leaderboardWorker.onEvent((message) => {
+  if (message.event !== 'changed' || message.act_id !== ACT_ID) return;
+  const cacheKey = `leaderboard:${message.region}:${message.page}`;
+  console.log(`[CACHE] Invalidating ${cacheKey} after refresh`);
+  playerCache.delete(cacheKey).catch(() => {});
+});
+
+export function warmupScraperWorkers(): void {
+  leaderboardWorker.start();
+  statsWorker.start();
+}
+
+// Each worker writes its own `# TYPE` lines; group samples per family so
+// every family appears once with a single TYPE line.
+function mergePrometheus(texts: string[]): string {
+  const types = new Map<string, string>();
+  const samples = new Map<string, string[]>();
+  for (const text of texts) {
+    // Reset per source, so one text's family never claims the next one's samples.
+    let family: string | undefined;
+    for (const line of text.split('\n')) {
+      if (line.startsWith('# TYPE ')) {
+        const [, , name, kind] = line.split(' ');
+        family = name;
+        if (!types.has(name)) types.set(name, kind);
+        if (!samples.has(name)) samples.set(name, []);
+      } else if (line && !line.startsWith('#')) {
+        const name = line.split('{')[0].split(' ')[0];
+        // Histogram samples carry _bucket/_sum/_count after the family name.
+        if (family === undefined || !name.startsWith(family)) {
+          family = name;
+          if (!samples.has(family)) samples.set(family, []);
+        }
+        samples.get(family)!.push(line);
+      }
+    }
+  }
+
+  const lines: string[] = [];
+  for (const [family, familySamples] of samples) {
+    const kind = types.get(family);
+    if (kind) lines.push(`# TYPE ${family} ${kind}`);
+    lines.push(...familySamples);
+  }
+  return lines.length ? lines.join('\n') + '\n' : '';
+}
+
+export async function getScraperMetrics(): Promise<string> {
+  const workers = [leaderboardWorker, statsWorker];
+  const texts = await Promise.all(workers.map(async (worker) => {
+    try {
+      const messages = await worker.request({ op: 'metrics', format: 'prometheus' });
+      const result = messages.find((message) => message.done)?.result as { text?: string; texts?: string[] } | undefined;
+      // A sharded leaderboard worker answers with one text per process.
+      return result?.texts ?? [result?.text || ''];
+    } catch (e) {
+      console.error('[METRICS] Failed to collect worker metrics:', e);
+      return [];
+    }
+  }));
+  return mergePrometheus(texts.flat());
+}
+
 export const REGION_MAP: Record<Region, string> = {
   'na': 'na',
   'eu': 'eu',
@@ -88,26 +156,13 @@ async function getLeaderboardViaPython(region: string, page: number): Promise<Le
   }
 
   try {
-    const proc = Bun.spawn([
-      "python3",
-      "python/leaderboard_scraper.py",
-      normalizedRegion,
-      page.toString(),
-      ACT_ID
-    ], {
-      cwd: process.cwd(),
-      stderr: "inherit"
+    const [message] = await leaderboardWorker.request({
+      region: normalizedRegion,
+      page,
+      act_id: ACT_ID
     });
 
-    const output = await new Response(proc.stdout).text();
-    const exitCode = await proc.exited;
-
-    if (exitCode !== 0) {
-      console.error(`[LEADERBOARD] Process failed with exit code ${exitCode}`);
-      return null;
-    }
-
-    const data = JSON.parse(output.trim());
+    const data = message?.result as { items?: Array<{ rank: number; riotId: string }>; error?: string } | undefined;
     if (data && data.items) {
       console.log(`[LEADERBOARD] Success for page ${page}`);
       return data.items.map((item: { rank: number; riotId: string }) => ({
@@ -168,25 +223,8 @@ async function getPlayerStatsViaPython(riotId: string): Promise<Partial<PlayerSt
   const sanitizedId = sanitization.sanitized;
   
   try {
-    const proc = Bun.spawn([
-      "python3", 
-      "python/stats_scraper.py", 
-      "profile", 
-      sanitizedId
-    ], {
-      cwd: process.cwd(),
-      stderr: "inherit"
-    });
-
-    const output = await new Response(proc.stdout).text();
-    const exitCode = await proc.exited;
-
-    if (exitCode !== 0) {
-      console.error(`[STATS] Process failed for ${sanitizedId} with exit code ${exitCode}`);
-      return null;
-    }
-
-    const data = JSON.parse(output.trim());
+    const messages = await statsWorker.request({ handles: [sanitizedId] });
+    const data = messages.find((message) => message.handle === sanitizedId)?.result as Partial<PlayerStats> | undefined;
 
     if (data && data.error) {
       return { error: data.error };